@@ -24,6 +24,12 @@ def count_bst_nodes(node):
 
 
 class BinarySearchTree:
+    """
+    binary search tree, with avl=True it is kept balanced on every insert and delete:
+    bf of every node is height of its right subtree minus height of its left one
+    and stays in [-1, 1], so the height is O(log n)
+    """
+
     class Node:
         def __init__(self, value):
             self.value = value
@@ -41,8 +47,9 @@ class BinarySearchTree:
         def has_no_child(self):
             return self.left is None and self.right is None
 
-    def __init__(self):
+    def __init__(self, avl=False):
         self.root = None
+        self.avl = avl
 
     def __str__(self):
         if self.root is None:
@@ -56,43 +63,119 @@ class BinarySearchTree:
                 nodes.extend([current_node.left, current_node.right])
         return result
 
+    def _replace_child(self, parent, child, node):
+        if parent is None:
+            self.root = node
+        elif parent.left is child:
+            parent.left = node
+        else:
+            parent.right = node
+
+    @staticmethod
+    def _rotate_left(node):
+        pivot = node.right
+        node.right, pivot.left = pivot.left, node
+        node.bf -= 1 + max(pivot.bf, 0)
+        pivot.bf -= 1 - min(node.bf, 0)
+        return pivot
+
+    @staticmethod
+    def _rotate_right(node):
+        pivot = node.left
+        node.left, pivot.right = pivot.right, node
+        node.bf += 1 - min(pivot.bf, 0)
+        pivot.bf += 1 + max(node.bf, 0)
+        return pivot
+
+    def _rebalance(self, node):
+        """
+        single or double rotation of node with bf of -2 or 2, returns new root of the subtree
+        """
+        if node.bf > 0:
+            if node.right.bf < 0:
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        if node.left.bf > 0:
+            node.left = self._rotate_left(node.left)
+        return self._rotate_right(node)
+
+    def _retrace(self, path, grown):
+        """
+        updates bf of nodes of path (pairs of node and whether the changed subtree is its left one)
+        from the bottom up after the subtree grew or shrank by one level, rotates unbalanced nodes
+        """
+        while path:
+            node, is_left = path.pop()
+            node.bf += -1 if is_left == grown else 1
+            if node.bf in (-2, 2):
+                sub_root = self._rebalance(node)
+                self._replace_child(path[-1][0] if path else None, node, sub_root)
+                node = sub_root
+            # subtree of node keeps its height
+            if (node.bf != 0) != grown:
+                return
+
     def insert(self, value):
         if self.root is None:
             self.root = self.Node(value)
             return
 
-        def insert_helper(node):
+        path = []
+        node = self.root
+        while True:
             if value == node.value:
-                pass
-            elif value < node.value:
-                if node.left is None:
-                    #  print(node.value)
-                    node.left = self.Node(value)
-                else:
-                    #  print(node.value)
-                    insert_helper(node.left)
-            else:
-                if node.right is None:
-                    node.right = self.Node(value)
-                else:
-                    insert_helper(node.right)
-        insert_helper(self.root)
+                return
+            is_left = value < node.value
+            path.append((node, is_left))
+            child = node.left if is_left else node.right
+            if child is None:
+                break
+            node = child
+
+        if is_left:
+            node.left = self.Node(value)
+        else:
+            node.right = self.Node(value)
+        if self.avl:
+            self._retrace(path, grown=True)
+
+    def delete(self, value):
+        """
+        removes value from the tree, node with two children takes the value of its successor
+        returns False if there is no such value
+        """
+        path = []
+        node = self.root
+        while node is not None and node.value != value:
+            is_left = value < node.value
+            path.append((node, is_left))
+            node = node.left if is_left else node.right
+        if node is None:
+            return False
+
+        if node.left is not None and node.right is not None:
+            path.append((node, False))
+            successor = node.right
+            while successor.left is not None:
+                path.append((successor, True))
+                successor = successor.left
+            node.value = successor.value
+            node = successor
+
+        self._replace_child(path[-1][0] if path else None, node, node.left or node.right)
+        if self.avl:
+            self._retrace(path, grown=False)
+        return True
 
     def insert_values(self, values):
         for value in values:
             self.insert(value)
 
     def search(self, value):
-
-        def search_helper(node):
-            if node is None or node.value == value:
-                return node
-            elif node.value > value:
-                return search_helper(node.left)
-            else:
-                return search_helper(node.right)
-
-        return search_helper(self.root)
+        node = self.root
+        while node is not None and node.value != value:
+            node = node.left if node.value > value else node.right
+        return node
 
     def k_min(self, k_index, node=None):
         current = self.root if node is None else node
@@ -150,7 +233,13 @@ class BinarySearchTree:
                     if value < node.value \
                     else (node, node.right)
 
+    def _check_not_avl(self):
+        # rotations by value do not update bf, avl tree is restructured only by insert and delete
+        if self.avl:
+            raise ValueError("avl tree cannot be rotated directly")
+
     def left_rotation(self, node_value):
+        self._check_not_avl()
 
         parent_node = self.get_parent(node_value)
         node = self.search(node_value)
@@ -172,6 +261,7 @@ class BinarySearchTree:
         return node
 
     def right_rotation(self, node_value):
+        self._check_not_avl()
 
         parent_node = self.get_parent(node_value)
         node = self.search(node_value)
@@ -193,6 +283,7 @@ class BinarySearchTree:
         return node
 
     def place_in_root(self, node_value, root: Node):
+        self._check_not_avl()
         if root is None or root.has_no_child():
             return
         parent = self.get_parent(node_value)
@@ -212,6 +303,8 @@ class BinarySearchTree:
         return abs(self.height(self.root.left) - self.height(self.root.right)) <= 1
 
     def balance(self):
+        if self.avl:
+            return
 
         def balance_helper(node):
             if node is None:
@@ -1,3 +1,7 @@
+import random
+
+import pytest
+
 from bst.bst import BinarySearchTree
 from bst.bst import count_bst_nodes
 
@@ -90,3 +94,64 @@ def test_balance_reverse():
     tree.balance()
     assert tree.is_balanced()
 
+
+def check_avl(node):
+    """
+    height of subtree of node, asserts that bf of every node is right
+    """
+    if node is None:
+        return 0
+    left, right = check_avl(node.left), check_avl(node.right)
+    assert node.bf == right - left and abs(node.bf) <= 1
+    return 1 + max(left, right)
+
+
+def test_avl_insert():
+    tree = BinarySearchTree(avl=True)
+    tree.insert_values(range(15, 11, -1))
+    assert tree.root.value == 14
+    assert tree.bypass(False) == [12, 13, 14, 15]
+
+    with pytest.raises(ValueError):
+        tree.left_rotation(14)
+    with pytest.raises(ValueError):
+        tree.place_in_root(12, tree.root)
+    assert tree.root.value == 14
+
+    tree = BinarySearchTree(avl=True)
+    tree.insert_values(range(5000))
+    assert check_avl(tree.root) <= 14
+    assert tree.search(4999).value == 4999
+
+
+def test_delete():
+    tree = BinarySearchTree()
+    tree.insert_values([15, 13, 17, 12, 14, 16, 18, 11])
+    assert tree.delete(13)
+    assert not tree.delete(13)
+    assert tree.delete(15)
+    assert tree.root.value == 16
+    assert tree.bypass(False) == [11, 12, 14, 16, 17, 18]
+
+    tree = BinarySearchTree(avl=True)
+    tree.insert_values(range(1000))
+    for value in range(0, 1000, 3):
+        assert tree.delete(value)
+    check_avl(tree.root)
+    assert tree.bypass(False) == [value for value in range(1000) if value % 3]
+
+
+def test_avl_random():
+    generator = random.Random(1)
+    tree = BinarySearchTree(avl=True)
+    values = set()
+    for _ in range(2000):
+        value = generator.randrange(200)
+        if generator.random() < 0.6:
+            tree.insert(value)
+            values.add(value)
+        else:
+            assert tree.delete(value) == (value in values)
+            values.discard(value)
+        check_avl(tree.root)
+    assert tree.bypass(False) == sorted(values)
@@ -0,0 +1,156 @@
+import time
+import tracemalloc
+
+import numpy as np
+
+from graph.coloring import dsatur_colors, gis_colors, portfolio_colors
+from graph.csr_graph import GraphCSR
+from graph.list_graph import GraphAdjList
+from graph.shortest_path import a_star, bidirectional_dijkstra
+from graph.traversal import breadth_first_search
+
+
+def random_graph(order, number_of_edges, seed=0):
+    """
+    random undirected graph in csr form, every edge is stored in both directions,
+    so number_of_edges is the number of stored (directed) edges
+    """
+    generator = np.random.default_rng(seed)
+    sources = generator.integers(0, order, number_of_edges // 2)
+    targets = generator.integers(0, order, number_of_edges // 2)
+    weights = generator.integers(1, 100, number_of_edges // 2).astype(np.float64)
+
+    return GraphCSR.from_edges(order,
+                               np.concatenate((sources, targets)),
+                               np.concatenate((targets, sources)),
+                               np.concatenate((weights, weights)))
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def bfs_scaling(sizes=(10 ** 5, 10 ** 6, 10 ** 7)):
+    for number_of_edges in sizes:
+        graph = random_graph(number_of_edges // 10, number_of_edges)
+        seconds = measure(breadth_first_search, graph)
+        print("bfs: {} vertices, {} edges, {:.3f} s, {:.1f} ns per edge".format(
+            graph.order(), graph.number_of_edges(), seconds, seconds / graph.number_of_edges() * 1e9))
+
+
+def node_memory(order=10 ** 6):
+    tracemalloc.start()
+    graph = GraphAdjList.of_order(order)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("nodes: {} vertices, {:.1f} MB, {:.0f} bytes per vertex".format(
+        graph.order(), size / 2 ** 20, size / graph.order()))
+
+
+def churn(order=10 ** 5, number_of_edges=10 ** 6, operations=2000, seed=0):
+    """
+    GraphAdjList with number_of_edges stored edges (pairs of opposite edges),
+    then operations removals and additions of double edges and operations // 10 removals of vertices
+    """
+    generator = np.random.default_rng(seed)
+    graph = GraphAdjList.of_order(order)
+    edges = generator.integers(0, order, (number_of_edges // 2, 2)).tolist()
+    seconds = measure(graph.add_edges_from, edges, True)
+    print("churn: {} vertices, {} edges, built in {:.3f} s".format(order, number_of_edges, seconds))
+
+    def replace_edges(pairs):
+        for first, second in pairs:
+            edge = (graph.find_by_name(first), graph.find_by_name(second))
+            graph.remove_double_edge(edge)
+            graph.add_double_edge(edge)
+
+    def remove_vertices(names):
+        for name in names:
+            graph.remove_vertex(graph.find_by_name(name))
+
+    seconds = measure(replace_edges, generator.integers(0, order, (operations, 2)).tolist())
+    print("churn: {:.1f} us per removal and addition of a double edge".format(seconds / operations * 1e6))
+    victims = generator.choice(order, operations // 10, replace=False).tolist()
+    seconds = measure(remove_vertices, victims)
+    print("churn: {:.2f} ms per removal of a vertex".format(seconds / len(victims) * 1e3))
+
+
+def coloring_scaling(sizes=(10 ** 4, 10 ** 5, 10 ** 6)):
+    for order in sizes:
+        graph = random_graph(order, order * 10)
+        for name, coloring, first_color in (('dsatur', dsatur_colors, 0), ('gis', gis_colors, 1)):
+            start = time.perf_counter()
+            colors = coloring(graph)
+            seconds = time.perf_counter() - start
+            print("{}: {} vertices, {} edges, {:.3f} s, {} colors".format(
+                name, graph.order(), graph.number_of_edges(), seconds, int(colors.max()) + 1 - first_color))
+
+
+def portfolio(order=1000, edges_per_vertex=25, budgets=(1.0, 5.0), workers=(1, 4)):
+    graph = random_graph(order, order * edges_per_vertex)
+    print("dsatur: {} vertices, {} colors; gis: {} colors".format(
+        order, int(dsatur_colors(graph).max()) + 1, int(gis_colors(graph).max())))
+    for time_budget in budgets:
+        for processes in workers:
+            start = time.perf_counter()
+            colors = portfolio_colors(graph, time_budget, processes)
+            seconds = time.perf_counter() - start
+            print("portfolio: {} workers, budget {} s, {:.3f} s, {} colors".format(
+                processes, time_budget, seconds, int(colors.max()) + 1))
+
+
+def grid_graph(side, seed=0):
+    """
+    side x side grid, every edge is stored in both directions with weight from 1 to 9
+    """
+    generator = np.random.default_rng(seed)
+    vertices = np.arange(side * side).reshape(side, side)
+    sources = np.concatenate((vertices[:, :-1].ravel(), vertices[:-1, :].ravel()))
+    targets = np.concatenate((vertices[:, 1:].ravel(), vertices[1:, :].ravel()))
+    weights = generator.integers(1, 10, len(sources)).astype(np.float64)
+
+    return GraphCSR.from_edges(side * side,
+                               np.concatenate((sources, targets)),
+                               np.concatenate((targets, sources)),
+                               np.concatenate((weights, weights)))
+
+
+def point_to_point(side=300, queries=20, seed=0):
+    graph = grid_graph(side, seed)
+    reverse = graph.reverse()
+    generator = np.random.default_rng(seed)
+    pairs = generator.integers(0, side * side, (queries, 2)).tolist()
+
+    def manhattan(target):
+        return lambda vertex: abs(vertex // side - target // side) + abs(vertex % side - target % side)
+
+    searches = (('dijkstra', lambda source, target: a_star(graph, source, target)),
+                ('a*', lambda source, target: a_star(graph, source, target, manhattan(target))),
+                ('bidirectional', lambda source, target: bidirectional_dijkstra(graph, source, target, reverse)))
+    for name, search in searches:
+        start = time.perf_counter()
+        settled = sum(search(source, target)[2] for source, target in pairs)
+        seconds = time.perf_counter() - start
+        print("{}: {} vertices, {} queries, {:.1f} ms and {:.0f} settled vertices per query".format(
+            name, graph.order(), queries, seconds / queries * 1e3, settled / queries))
+
+
+def center_methods(order=1000, degree=10):
+    graph = random_graph(order, order * degree, seed=1)
+    matrix = graph.to_adj_matrix()
+    for method in ('floid', 'dijkstra'):
+        seconds = measure(matrix.center, method)
+        print("center ({}): {} vertices, {} edges, {:.3f} s, center {}".format(
+            method, graph.order(), graph.number_of_edges(), seconds, matrix.center(method)))
+
+
+if __name__ == "__main__":
+    bfs_scaling()
+    node_memory()
+    center_methods()
+    point_to_point()
+    churn()
+    coloring_scaling()
+    portfolio()
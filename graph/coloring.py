@@ -1,79 +1,391 @@
-from copy import deepcopy
+import heapq
+import multiprocessing
+import os
+import time
+
+import numpy as np
 
 from graph.list_graph import GraphAdjList
 from graph.node import Node
+from graph.parallel import share_array, attach_array
+
+_graph = None  # graph of the portfolio worker process, built over shared memory
+
+
+def gis_colors(graph, seed=None):
+    """
+    greedy independent sets coloring of undirected graph in csr form (graph.csr_graph.GraphCSR,
+    every edge stored in both directions), returns colors (from 1) by vertex;
+    color c is given to an independent set built from uncolored vertices: the next vertex
+    of the set has the fewest edges to vertices which can still join it, its neighbors are blocked;
+    those degrees are kept in a bucket queue with lazy deletion and updated as vertices are taken
+    and blocked, so a color takes O(V + E); ties go to the vertex whose degree dropped last,
+    then to the smallest index (random order with seed); colored vertices are marked in a bitmap
+    """
+    order = graph.order()
+    offsets, adjacency = graph.offsets.tolist(), graph.targets.tolist()
+
+    residual_degrees = np.diff(graph.offsets).tolist()  # number of edges to uncolored vertices
+    colored = bytearray(order)
+    colors = [0] * order
+
+    uncolored = np.arange(order)
+    if seed is not None:
+        uncolored = np.random.default_rng(seed).permutation(order)
+    color = 0
+    while len(uncolored):
+        color += 1
+        available = bytearray((np.frombuffer(colored, dtype=np.uint8) ^ 1).tobytes())
+        degrees = list(residual_degrees)  # number of edges to available vertices
+        buckets = [[] for _ in range(max(degrees[vertex] for vertex in uncolored.tolist()) + 1)]
+        # buckets are stacks, so vertices of the same degree are taken in order of uncolored
+        for vertex in reversed(uncolored.tolist()):
+            buckets[degrees[vertex]].append(vertex)
+
+        minimum = 0
+        while minimum < len(buckets):
+            bucket = buckets[minimum]
+            if not bucket:
+                minimum += 1
+                continue
+            vertex = bucket.pop()
+            # stale entry, the vertex was blocked or moved to a lower bucket
+            if not available[vertex] or degrees[vertex] != minimum:
+                continue
+
+            colors[vertex] = color
+            colored[vertex] = 1
+            available[vertex] = 0
+            for neighbor in adjacency[offsets[vertex]:offsets[vertex + 1]]:
+                residual_degrees[neighbor] -= 1
+                if not available[neighbor]:
+                    continue
+                available[neighbor] = 0
+                for second in adjacency[offsets[neighbor]:offsets[neighbor + 1]]:
+                    if available[second]:
+                        degrees[second] -= 1
+                        buckets[degrees[second]].append(second)
+                        minimum = min(minimum, degrees[second])
+
+        uncolored = uncolored[np.frombuffer(colored, dtype=np.uint8)[uncolored] == 0]
+
+    return np.array(colors, dtype=np.int64)
 
 
 def gis(list_graph: GraphAdjList):
+    """
+    returns {vertex number: color}, see gis_colors; the graph is not changed,
+    directions of edges are ignored
+    """
+    colors = gis_colors(list_graph.to_csr().symmetric())
+    return {node.number: color for node, color in zip(list_graph.nodes, colors.tolist())}
+
+
+def dsatur_colors(graph, seed=None):
+    """
+    dsatur coloring of graph in csr form (graph.csr_graph.GraphCSR), returns colors (from 0) by vertex;
+    next vertex has the most colors among its colored in-neighbors, then the most edges,
+    then the smallest index (a random rank with seed); vertices wait in a heap with lazy updates,
+    colors of neighbors are kept as bitmasks, so it takes O((V + E) log V)
+    """
+    order = graph.order()
+    ranks = list(range(order)) if seed is None else np.random.default_rng(seed).permutation(order).tolist()
+    adjacency = graph.targets.tolist()
+    offsets = graph.offsets.tolist()
+
+    masks = [0] * order
+    saturations = [0] * order
+    colors = [-1] * order
+    heap = [(0, offsets[vertex] - offsets[vertex + 1], ranks[vertex], vertex) for vertex in range(order)]
+    heapq.heapify(heap)
+
+    while heap:
+        saturation, _, _, vertex = heapq.heappop(heap)
+        if colors[vertex] != -1 or -saturation != saturations[vertex]:
+            continue
 
-    def get_possible_vertices_to_color(not_colored, adjacent_colors, color):
-        vertices = []
-        for vertex in not_colored:
-            if color not in adjacent_colors[vertex.number]:
-                vertices.append(vertex)
-        return vertices
-
-    copy_graph = deepcopy(list_graph)
-    vertices_colors = {}
-    not_colored_vertices = [vertex for vertex in copy_graph.nodes]
-    adjacent_vertices_colors = {vertex.number: set() for vertex in not_colored_vertices}
-    c = 1
-
-    while len(not_colored_vertices) != 0:
-        available = get_possible_vertices_to_color(not_colored_vertices, adjacent_vertices_colors, c)
-        available_degrees = [(available[i], copy_graph.nodes[i].degree()) for i in range(len(available))]
-
-        while len(available) != 0:
-            min_vertex, degree = min(available_degrees, key=lambda item: item[1])
-            if c not in adjacent_vertices_colors[min_vertex.number]:
-                vertices_colors[min_vertex.number] = c
-                not_colored_vertices.remove(min_vertex)
-                for neighbor, _ in min_vertex.get_neighbors().copy():
-                    adjacent_vertices_colors[neighbor.number].add(c)
-                    if neighbor in available:
-                        available.remove(neighbor)
-                        for available_degree in available_degrees:
-                            if available_degree[0] == neighbor:
-                                available_degrees.remove(available_degree)
-                    copy_graph.remove_double_edge((neighbor, min_vertex))
-
-            available_degrees.remove((min_vertex, degree))
-            available.remove(min_vertex)
-
-        c += 1
-    return vertices_colors
+        mask = masks[vertex]
+        color = (~mask & (mask + 1)).bit_length() - 1  # the smallest color not used by neighbors
+        colors[vertex] = color
+
+        bit = 1 << color
+        for neighbor in adjacency[offsets[vertex]:offsets[vertex + 1]]:
+            if not masks[neighbor] & bit:
+                masks[neighbor] |= bit
+                saturations[neighbor] += 1
+                if colors[neighbor] == -1:
+                    heapq.heappush(heap, (-saturations[neighbor], offsets[neighbor] - offsets[neighbor + 1],
+                                          ranks[neighbor], neighbor))
+
+    return np.array(colors, dtype=np.int64)
 
 
 def dsatur(list_graph: GraphAdjList):
+    """
+    returns {vertex number: color}, see dsatur_colors; the graph is not changed
+    """
+    colors = dsatur_colors(list_graph.to_csr())
+    return {node.number: color for node, color in zip(list_graph.nodes, colors.tolist())}
+
+
+class _TimeIsUp(Exception):
+    pass
+
+
+def _count(mask):
+    return bin(mask).count('1')
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _greedy_clique(neighbors):
+    """
+    clique grown greedily from every vertex, the largest one is a lower bound of number of colors
+    """
+    best = []
+    for seed in range(len(neighbors)):
+        clique, candidates = [seed], neighbors[seed]
+        while candidates:
+            vertex = max(_bits(candidates), key=lambda candidate: _count(neighbors[candidate] & candidates))
+            clique.append(vertex)
+            candidates &= neighbors[vertex]
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+
+def exact_colors(graph, time_budget=None):
+    """
+    coloring of undirected graph in csr form (graph.csr_graph.GraphCSR) with the least number of colors
+    by dsatur branch and bound, meant for graphs of up to ~150 vertices; loops are ignored
+    vertices and color classes are bitsets (python ints), the search starts from dsatur coloring
+    as upper bound and greedy clique colored in advance as lower bound;
+    returns colors (from 0) by vertex and True if the coloring is proved optimal,
+    with time_budget (seconds) the best coloring found so far when time is up and False
+    """
+    order = graph.order()
+    if order == 0:
+        return np.zeros(0, dtype=np.int64), True
+
+    neighbors = [0] * order
+    for source, target in zip(graph.get_sources().tolist(), graph.targets.tolist()):
+        if source != target:
+            neighbors[source] |= 1 << target
+            neighbors[target] |= 1 << source
+
+    best_colors = dsatur_colors(graph).tolist()
+    clique = _greedy_clique(neighbors)
+    lower_bound = len(clique)
+    if max(best_colors) + 1 == lower_bound:
+        return np.array(best_colors, dtype=np.int64), True
+
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    state = {'best': max(best_colors) + 1, 'colors': best_colors, 'nodes': 0}
+    colors = [-1] * order
+    classes = []  # bitset of vertices of every color
+    for color, vertex in enumerate(clique):
+        colors[vertex] = color
+        classes.append(1 << vertex)
+
+    def search(uncolored):
+        # a subtree using as many colors as the best coloring cannot beat it
+        if len(classes) >= state['best']:
+            return
+        if not uncolored:
+            state['best'], state['colors'] = len(classes), colors.copy()
+            return
+        state['nodes'] += 1
+        if deadline is not None and state['nodes'] % 256 == 0 and time.perf_counter() > deadline:
+            raise _TimeIsUp()
+
+        # dsatur choice: the most colors among neighbors, then the most uncolored neighbors
+        vertex, key = None, None
+        for candidate in _bits(uncolored):
+            candidate_key = (sum(1 for members in classes if members & neighbors[candidate]),
+                             _count(neighbors[candidate] & uncolored))
+            if key is None or candidate_key > key:
+                vertex, key = candidate, candidate_key
+
+        rest = uncolored & ~(1 << vertex)
+        for color in range(len(classes)):
+            if not classes[color] & neighbors[vertex]:
+                classes[color] |= 1 << vertex
+                colors[vertex] = color
+                search(rest)
+                classes[color] &= ~(1 << vertex)
+                if state['best'] == lower_bound:
+                    return
+
+        # a new color is opened only if it can still beat the best coloring
+        if len(classes) + 1 < state['best']:
+            classes.append(1 << vertex)
+            colors[vertex] = len(classes) - 1
+            search(rest)
+            classes.pop()
+        colors[vertex] = -1
+
+    uncolored = (1 << order) - 1
+    for vertex in clique:
+        uncolored &= ~(1 << vertex)
+
+    try:
+        search(uncolored)
+    except _TimeIsUp:
+        return np.array(state['colors'], dtype=np.int64), False
+
+    return np.array(state['colors'], dtype=np.int64), True
+
+
+def exact_coloring(list_graph: GraphAdjList, time_budget=None):
+    """
+    returns {vertex number: color} and True if it is proved optimal, see exact_colors
+    """
+    colors, optimal = exact_colors(list_graph.to_csr(), time_budget)
+    return {node.number: color for node, color in zip(list_graph.nodes, colors.tolist())}, optimal
+
+
+def tabucol(graph, colors, number_of_colors, seed=None, max_iterations=10 ** 5, deadline=None):
+    """
+    tabu search for coloring of undirected graph in csr form with number_of_colors colors,
+    starting from colors (colors out of range are replaced at random); every step moves a conflicting
+    vertex to the color which removes the most conflicts and forbids its old color for a while;
+    deadline is time.time() to stop at; returns colors without conflicts or None; loops are ignored
+    """
+    generator = np.random.default_rng(seed)
+    order, offsets = graph.order(), graph.offsets
+    sources, targets = graph.get_sources().astype(np.int64), graph.targets.astype(np.int64)
+    proper = sources != targets
+
+    colors = np.array(colors, dtype=np.int64)
+    out_of_range = colors >= number_of_colors
+    colors[out_of_range] = generator.integers(0, number_of_colors, int(out_of_range.sum()))
+
+    # neighbor_colors[v][c] is the number of neighbors of v colored with c
+    neighbor_colors = np.zeros((order, number_of_colors), dtype=np.int64)
+    np.add.at(neighbor_colors, (sources[proper], colors[targets[proper]]), 1)
+    tabu = np.zeros((order, number_of_colors), dtype=np.int64)
+    vertices = np.arange(order)
+
+    conflicts = int(neighbor_colors[vertices, colors].sum())  # every conflict is counted from both ends
+    best_conflicts = conflicts
+    forbidden = np.iinfo(np.int64).max
+    for iteration in range(max_iterations):
+        if conflicts == 0:
+            return colors
+        if deadline is not None and iteration % 64 == 0 and time.time() > deadline:
+            break
+
+        conflicting = np.flatnonzero(neighbor_colors[vertices, colors] > 0)
+        own = neighbor_colors[conflicting, colors[conflicting]]
+        deltas = neighbor_colors[conflicting] - own[:, None]
+        # tabu moves are allowed only if they give the best result so far
+        allowed = (tabu[conflicting] <= iteration) | (conflicts + 2 * deltas < best_conflicts)
+        allowed[np.arange(len(conflicting)), colors[conflicting]] = False
+        deltas = np.where(allowed, deltas, forbidden)
+        best_delta = deltas.min()
+        if best_delta == forbidden:
+            continue
+
+        row, color = divmod(int(generator.choice(np.flatnonzero(deltas.ravel() == best_delta))), number_of_colors)
+        vertex = conflicting[row]
+        old_color = colors[vertex]
+        neighbors = targets[offsets[vertex]:offsets[vertex + 1]]
+        neighbors = neighbors[neighbors != vertex]
+        np.subtract.at(neighbor_colors, (neighbors, old_color), 1)
+        np.add.at(neighbor_colors, (neighbors, color), 1)
+        colors[vertex] = color
+
+        conflicts += 2 * int(best_delta)
+        best_conflicts = min(best_conflicts, conflicts)
+        tabu[vertex, old_color] = iteration + int(0.6 * len(conflicting)) + int(generator.integers(0, 10))
+
+    return colors if conflicts == 0 else None
+
+
+def _run_strategy(graph, strategy, seed, deadline):
+    """
+    repeats randomized strategy ('dsatur', 'gis' or 'tabucol') until deadline (time.time()),
+    returns the coloring (from 0) with the least number of colors; at least one run is made
+    """
+    generator = np.random.default_rng(seed)
+    best = None
+    while True:
+        run_seed = int(generator.integers(0, 2 ** 32))
+        if strategy == 'dsatur':
+            colors = dsatur_colors(graph, run_seed)
+        elif strategy == 'gis':
+            colors = gis_colors(graph, run_seed) - 1
+        elif best is None:
+            colors = dsatur_colors(graph, run_seed)
+        elif best.max() == 0:
+            return best
+        else:
+            # tabucol tries to get rid of the last color of the best coloring
+            colors = tabucol(graph, best, int(best.max()), run_seed, deadline=deadline)
+
+        if colors is not None and (best is None or colors.max() < best.max()):
+            best = colors
+        if time.time() >= deadline:
+            return best
+
+
+def _init_portfolio_worker(offsets, targets):
+    from graph.csr_graph import GraphCSR
+
+    global _graph
+    _graph = GraphCSR(attach_array(offsets), attach_array(targets))
+
+
+def _portfolio_worker(task):
+    strategy, seed, deadline = task
+    return _run_strategy(_graph, strategy, seed, deadline)
 
-    def get_vertices_to_color(not_colored_vertices_, adjacent_vertices_colors_):
-        vertex_to_color_ = next(iter(not_colored_vertices_))
-        for vertex in not_colored_vertices_:
-            len_vertex = len(adjacent_vertices_colors_[vertex.number])
-            len_vertex_to_color = len(adjacent_vertices_colors_[vertex_to_color_.number])
-            if len_vertex > len_vertex_to_color or \
-                    (len_vertex == len_vertex_to_color and vertex.degree() > vertex_to_color_.degree()):
-                vertex_to_color_ = vertex
 
-        return vertex_to_color_
+def portfolio_colors(graph, time_budget=1.0, workers=None, strategies=('dsatur', 'gis', 'tabucol'), seed=0):
+    """
+    coloring of undirected graph in csr form (graph.csr_graph.GraphCSR) with the least number of colors
+    found by workers processes within time_budget seconds; worker i repeats randomized strategies[i % len]
+    ('dsatur', 'gis' or 'tabucol') until the deadline, arrays of the graph are shared with the workers;
+    with one worker strategies run one after another in this process, sharing the budget;
+    returns colors (from 0) by vertex
+    """
+    if graph.order() == 0:
+        return np.zeros(0, dtype=np.int64)
 
-    copy_graph = deepcopy(list_graph)
-    vertices_colors = {}
-    not_colored_vertices = [vertex for vertex in copy_graph.nodes]
-    adjacent_vertices_colors = {vertex.number: set() for vertex in not_colored_vertices}
-    num_used_colors = 1
+    workers = workers or os.cpu_count() or 1
+    start = time.time()
+    if workers == 1:
+        results = [_run_strategy(graph, strategy, seed + i, start + time_budget * (i + 1) / len(strategies))
+                   for i, strategy in enumerate(strategies)]
+        return min(results, key=lambda colors: colors.max())
 
-    while len(not_colored_vertices) != 0:
-        vertex_to_color = get_vertices_to_color(not_colored_vertices, adjacent_vertices_colors)
-        available_colors = set(range(num_used_colors)) - adjacent_vertices_colors[vertex_to_color.number]
+    tasks = [(strategies[i % len(strategies)], seed + i, start + time_budget) for i in range(workers)]
+    blocks = []
+    try:
+        descriptions = []
+        for array in (graph.offsets, graph.targets):
+            block, description = share_array(array)
+            blocks.append(block)
+            descriptions.append(description)
 
-        color, num_used_colors = (min(available_colors), num_used_colors) \
-            if available_colors else (num_used_colors, num_used_colors + 1)
+        with multiprocessing.Pool(workers, _init_portfolio_worker, descriptions) as pool:
+            results = pool.map(_portfolio_worker, tasks)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
 
-        vertices_colors[vertex_to_color.number] = color
-        not_colored_vertices.remove(vertex_to_color)
+    return min(results, key=lambda colors: colors.max())
 
-        for neighbor, _ in vertex_to_color.get_neighbors():
-            adjacent_vertices_colors[neighbor.number].add(color)
 
-    return vertices_colors
+def portfolio_coloring(list_graph: GraphAdjList, time_budget=1.0, workers=None):
+    """
+    returns {vertex number: color}, see portfolio_colors
+    """
+    colors = portfolio_colors(list_graph.to_csr(), time_budget, workers)
+    return {node.number: color for node, color in zip(list_graph.nodes, colors.tolist())}
@@ -0,0 +1,191 @@
+import numpy as np
+
+from graph.list_graph import GraphAdjList
+from graph.matrix_graph import GraphAdjMatrix
+from graph.node import Node
+from graph.parallel import multi_source_distances
+from graph.shortest_path import dijkstra
+from graph.spanning_tree import kruskal, prim
+from graph.traversal import breadth_first_search, number_of_components, bipartition, has_non_tree_edge
+
+
+class GraphCSR:
+    """
+    graph in compressed sparse row form:
+    neighbors of vertex i are targets[offsets[i]:offsets[i + 1]],
+    weights of those edges are stored at the same positions in weights
+    """
+
+    def __init__(self, offsets, targets, weights=None, names=None):
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        self.targets = np.ascontiguousarray(targets, dtype=self.index_dtype(len(self.offsets) - 1))
+        if weights is None:
+            weights = np.ones(len(self.targets))
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.names = names
+        self._number_connected_components = 1
+
+    @staticmethod
+    def index_dtype(order):
+        return np.int32 if order < np.iinfo(np.int32).max else np.int64
+
+    @classmethod
+    def from_edges(cls, order, sources, targets, weights=None, names=None):
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.ones(len(sources)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+        # stable sort keeps the insertion order of the edges of every vertex
+        permutation = np.argsort(sources, kind='stable')
+        offsets = np.zeros(order + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=order), out=offsets[1:])
+
+        return cls(offsets, targets[permutation], weights[permutation], names)
+
+    @classmethod
+    def from_adj_list(cls, graph: GraphAdjList):
+        offsets = np.zeros(graph.order() + 1, dtype=np.int64)
+        targets = []
+        weights = []
+        for i, node in enumerate(graph.nodes):
+            for neighbor, weight in node.get_neighbors():
+                targets.append(graph.index_of(neighbor))
+                weights.append(weight)
+            offsets[i + 1] = len(targets)
+
+        return cls(offsets, targets, weights, [node.name for node in graph.nodes])
+
+    @classmethod
+    def from_adj_matrix(cls, graph: GraphAdjMatrix):
+        sources, targets = np.nonzero(graph.adjacency)
+
+        return cls.from_edges(graph.size, sources, targets, graph.weights[sources, targets])
+
+    def to_adj_list(self):
+        nodes = [Node() for _ in range(self.order())]
+        graph = GraphAdjList(nodes, 0)
+
+        if self.names is not None:
+            for node, name in zip(nodes, self.names):
+                node.name = name
+            graph.reindex()
+
+        for i, node in enumerate(nodes):
+            begin, end = self.offsets[i], self.offsets[i + 1]
+            node.neighbors = [(nodes[j], weight) for j, weight in zip(self.targets[begin:end].tolist(),
+                                                                      self.weights[begin:end].tolist())]
+            node.reindex_neighbors()
+
+        return graph
+
+    def to_adj_matrix(self):
+        matrix = np.full((self.order(), self.order()), np.inf)
+        # the matrix keeps a single edge per pair, so parallel edges collapse to the lightest one
+        np.minimum.at(matrix, (self.get_sources(), self.targets), self.weights)
+
+        return GraphAdjMatrix(matrix, self.order())
+
+    def __str__(self):
+        result = ""
+        for i in range(self.order()):
+            neighbors, weights = self.get_neighbors(i)
+            result += "node: {} -> {}\n".format(self.get_name(i), list(zip(neighbors.tolist(), weights.tolist())))
+        return result
+
+    def order(self):
+        return len(self.offsets) - 1
+
+    def number_of_edges(self):
+        return len(self.targets)
+
+    def get_name(self, vertex):
+        return vertex if self.names is None else self.names[vertex]
+
+    def get_sources(self):
+        return np.repeat(np.arange(self.order(), dtype=self.targets.dtype), np.diff(self.offsets))
+
+    def get_neighbors(self, vertex):
+        begin, end = self.offsets[vertex], self.offsets[vertex + 1]
+        return self.targets[begin:end], self.weights[begin:end]
+
+    def degree(self, vertex):
+        return int(self.offsets[vertex + 1] - self.offsets[vertex])
+
+    def reverse(self):
+        """
+        graph with every edge turned around
+        """
+        return GraphCSR.from_edges(self.order(), self.targets, self.get_sources(), self.weights, self.names)
+
+    def symmetric(self):
+        """
+        undirected graph with every pair of adjacent vertices joined once in both directions
+        with the smaller weight, neighbors of a vertex are sorted
+        """
+        sources = np.concatenate((self.get_sources(), self.targets)).astype(np.int64)
+        targets = np.concatenate((self.targets, self.get_sources())).astype(np.int64)
+        weights = np.concatenate((self.weights, self.weights))
+
+        permutation = np.lexsort((weights, targets, sources))
+        sources, targets, weights = sources[permutation], targets[permutation], weights[permutation]
+        first = np.ones(len(sources), dtype=bool)
+        first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+
+        return GraphCSR.from_edges(self.order(), sources[first], targets[first], weights[first], self.names)
+
+    def width_bypass(self, start=0):
+        levels, _, components = breadth_first_search(self, start)
+        self._number_connected_components = number_of_components(components)
+        return levels
+
+    def number_of_connected_components(self):
+        self.width_bypass()
+        return self._number_connected_components
+
+    def is_connected(self):
+        return self.number_of_connected_components() == 1
+
+    def is_bipartite(self):
+        levels, _, _ = breadth_first_search(self)
+        sides = bipartition(self, levels)
+
+        if sides is None:
+            return False, []
+
+        return True, [np.flatnonzero(sides == 0), np.flatnonzero(sides == 1)]
+
+    def has_cycle(self):
+        _, parents, _ = breadth_first_search(self)
+        return has_non_tree_edge(self, parents)
+
+    def dijkstra(self, start=0, targets=None):
+        return dijkstra(self, start, targets)
+
+    def distances(self, sources, processes=None):
+        return multi_source_distances(self, sources, processes)
+
+    def tree_from_edges(self, sources, targets, weights):
+        sources, targets = np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        return GraphCSR.from_edges(self.order(),
+                                   np.concatenate((sources, targets)),
+                                   np.concatenate((targets, sources)),
+                                   np.concatenate((weights, weights)),
+                                   self.names)
+
+    def kruskal(self, as_edges=False):
+        """
+        returns spanning forest of minimum weight
+        which build with kruskal's algorithm
+        """
+        tree_edges = kruskal(self)
+        return tree_edges if as_edges else self.tree_from_edges(*tree_edges)
+
+    def prim(self, as_edges=False):
+        """
+        returns spanning forest of minimum weight
+        which build with prim's algorithm
+        """
+        tree_edges = prim(self)
+        return tree_edges if as_edges else self.tree_from_edges(*tree_edges)
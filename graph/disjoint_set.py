@@ -0,0 +1,50 @@
+class DisjointSet:
+    """
+    disjoint sets of elements 0..size-1 with union by rank and path compression,
+    parents and ranks are kept in flat lists indexed by element
+    """
+
+    def __init__(self, size=0):
+        self.parents = list(range(size))
+        self.ranks = [0] * size
+        self.count = size
+
+    def __len__(self):
+        return len(self.parents)
+
+    def add(self):
+        self.parents.append(len(self.parents))
+        self.ranks.append(0)
+        self.count += 1
+        return len(self.parents) - 1
+
+    def find(self, element):
+        parents = self.parents
+        root = element
+        while parents[root] != root:
+            root = parents[root]
+
+        while parents[element] != root:
+            parents[element], element = root, parents[element]
+
+        return root
+
+    def union(self, first, second):
+        """
+        merges sets of first and second, returns False if they were already in one set
+        """
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+
+        if self.ranks[first] < self.ranks[second]:
+            first, second = second, first
+        self.parents[second] = first
+        if self.ranks[first] == self.ranks[second]:
+            self.ranks[first] += 1
+        self.count -= 1
+
+        return True
+
+    def connected(self, first, second):
+        return self.find(first) == self.find(second)
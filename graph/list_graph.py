@@ -1,18 +1,53 @@
-from collections import deque
 import numpy as np
-from copy import deepcopy
 
+from graph.disjoint_set import DisjointSet
 from graph.node import Node
+from graph.parallel import multi_source_distances
+from graph.shortest_path import dijkstra, reconstruct_path, a_star, bidirectional_dijkstra
+from graph.spanning_tree import kruskal, prim
+from graph.traversal import breadth_first_search, depth_first_search, number_of_components, bipartition, \
+    has_non_tree_edge, euler_path, topological_order
 
 
 class GraphAdjList:
 
-    def __init__(self, nodes, first_node_name='a'):
+    def __init__(self, nodes, first_node_name='a', labels=None):
+        """
+        nodes are named from first_node_name on: 'a', 'b', ... for a letter
+        or first_node_name, first_node_name + 1, ... for an integer (integer-id mode);
+        labels are optional external names of nodes kept apart from node names;
+        nodes are hashed by name, so they must not be in sets or dict keys while the graph renames them
+        """
         self.nodes = nodes
         self._number_connected_components = 1
+        self._first_node_name = first_node_name
         for i in range(len(self.nodes)):
-            self.nodes[i].name = chr(ord(first_node_name) + i)
+            self.nodes[i].name = self._next_name(first_node_name, i)
             self.nodes[i].number = i
+        self._next_number = len(self.nodes)  # numbers of removed nodes are not reused
+        self._index = {}  # name -> position in nodes
+        self.reindex()
+
+        self._tracking_components = False
+        # DisjointSet of positions, built on demand (are_connected or tracking), None after removals
+        self._components = None
+
+        self._labels = {}  # name -> label
+        self._names_by_label = {}  # label -> name
+        if labels is not None:
+            for node, label in zip(self.nodes, labels):
+                self.set_label(node, label)
+
+    @classmethod
+    def of_order(cls, order, labels=None):
+        """
+        graph with order nodes in integer-id mode (names 0..order-1)
+        """
+        return cls([Node() for _ in range(order)], 0, labels)
+
+    @staticmethod
+    def _next_name(name, step=1):
+        return name + step if isinstance(name, int) else chr(ord(name) + step)
 
     def __str__(self):
         result = ""
@@ -26,11 +61,70 @@ class GraphAdjList:
                 return False
         return True
 
-    def find_by_name(self, name):
+    def reindex(self):
+        """
+        rebuilds name lookups after nodes were renamed,
+        sets and dicts holding renamed nodes have to be rebuilt as well (nodes are hashed by name)
+        """
+        self._index = {node.name: i for i, node in enumerate(self.nodes)}
         for node in self.nodes:
-            if node.name == name:
-                return node
-        return None
+            node.reindex_neighbors()
+
+    def find_by_name(self, name):
+        position = self._index.get(name)
+        return None if position is None else self.nodes[position]
+
+    def index_of(self, node):
+        return self._index.get(node.name)
+
+    def has_vertex(self, node):
+        return node.name in self._index
+
+    def set_label(self, node, label):
+        """
+        labels are unique, the previous label of node stops resolving to it
+        """
+        owner = self._names_by_label.get(label)
+        if owner is not None and owner != node.name:
+            raise ValueError("label {} is already set for node {}".format(label, owner))
+
+        if node.name in self._labels:
+            del self._names_by_label[self._labels[node.name]]
+        self._labels[node.name] = label
+        self._names_by_label[label] = node.name
+
+    def get_label(self, node):
+        return self._labels.get(node.name)
+
+    def find_by_label(self, label):
+        name = self._names_by_label.get(label)
+        return None if name is None else self.find_by_name(name)
+
+    def _find(self, vertex):
+        return self.find_by_name(vertex.name if isinstance(vertex, Node) else vertex)
+
+    def track_components(self, enabled=True):
+        """
+        keeps union-find index of connected components (edges are taken as undirected),
+        it is updated by add_edge, add_double_edge, add_edges_from and add_vertex
+        and rebuilt lazily after removals, so number_of_connected_components
+        and is_connected do not traverse the graph (and do not mark nodes);
+        edges added to nodes directly, not through the graph, are not seen by the index
+        """
+        self._tracking_components = enabled
+
+    def _component_index(self):
+        if self._components is None:
+            components = DisjointSet(self.order())
+            for i, node in enumerate(self.nodes):
+                for neighbor, _ in node.neighbors:
+                    components.union(i, self._index[neighbor.name])
+            self._components = components
+        return self._components
+
+    def _join_components(self, source, target):
+        if self._components is not None:
+            self._components.union(self._index[source.name], self._index[target.name])
 
     def get_edges(self):
         edges = []
@@ -51,44 +145,82 @@ class GraphAdjList:
         return edges
 
     def add_edge(self, edge, weight=1):
-        correspond_edge = (self.find_by_name(edge[0].name), self.find_by_name(edge[1].name))
-        if correspond_edge[0] not in self.nodes or correspond_edge[1] not in self.nodes:
+        source, target = self.find_by_name(edge[0].name), self.find_by_name(edge[1].name)
+        if source is None or target is None:
             return
 
-        correspond_edge[0].neighbors.append((correspond_edge[1], weight))
+        source.add_neighbor(target, weight)
+        self._join_components(source, target)
 
     def add_double_edge(self, edge, weight=1):
         self.add_edge(edge, weight)
         self.add_edge((edge[1], edge[0]), weight)
 
+    def add_edges_from(self, edges, double=False):
+        """
+        bulk loader, edges are (vertex, vertex) or (vertex, vertex, weight),
+        vertex is a node or a name of a node of this graph
+        """
+        for edge in edges:
+            source, target = self._find(edge[0]), self._find(edge[1])
+            if source is None or target is None:
+                continue
+            weight = edge[2] if len(edge) > 2 else 1
+            source.add_neighbor(target, weight)
+            if double:
+                target.add_neighbor(source, weight)
+            self._join_components(source, target)
+
     def remove_edge(self, edge):
-        correspond_edge = (self.find_by_name(edge[0].name), self.find_by_name(edge[1].name))
-        if correspond_edge[0] not in self.nodes or correspond_edge[1] not in self.nodes:
+        source, target = self.find_by_name(edge[0].name), self.find_by_name(edge[1].name)
+        if source is None or target is None:
             return
 
-        if self.is_adjacent(correspond_edge):
-            for vertex, weight in correspond_edge[0].get_neighbors():
-                if vertex == correspond_edge[1]:
-                    correspond_edge[0].get_neighbors().remove((correspond_edge[1], weight))
+        source.remove_neighbor(target.name)
+        self._components = None
 
     def remove_double_edge(self, edge):
         self.remove_edge(edge)
         self.remove_edge((edge[1], edge[0]))
 
-    def add_vertex(self):
-        self.nodes.append(Node(chr(ord(self.nodes[-1].name) + 1)))
+    def add_vertex(self, label=None):
+        name = self._next_name(self.nodes[-1].name) if self.nodes else self._first_node_name
+        node = Node(name, self._next_number)
+        self._next_number += 1
+        self._index[node.name] = len(self.nodes)
+        self.nodes.append(node)
+        if label is not None:
+            self.set_label(node, label)
+        if self._components is not None:
+            self._components.add()
+        return node
 
     def remove_vertex(self, remove_node):
-        if remove_node in self.nodes:
-            for node in self.nodes:
-                if (remove_node, 1) in node.get_neighbors() and node != remove_node:
-                    node.get_neighbors().remove(remove_node)
-            return self.nodes.remove(remove_node)
-        return None
+        """
+        only edges incident to remove_node are touched (in-edges are found through
+        reverse adjacency of the node), the rest is shifting positions of next nodes
+        """
+        position = self.index_of(remove_node)
+        if position is None:
+            return None
+
+        remove_node = self.nodes.pop(position)
+        self._components = None
+        del self._index[remove_node.name]
+        if remove_node.name in self._labels:
+            label = self._labels.pop(remove_node.name)
+            if self._names_by_label.get(label) == remove_node.name:
+                del self._names_by_label[label]
+        self._index.update(zip([node.name for node in self.nodes[position:]], range(position, len(self.nodes))))
+
+        for source in remove_node.get_sources():
+            source.remove_neighbor(remove_node.name)
+        for neighbor, _ in remove_node.get_neighbors():
+            neighbor._discard_source(remove_node)
 
     def is_adjacent(self, edge):
 
-        if edge[0] not in self.nodes or edge[1] not in self.nodes:
+        if not self.has_vertex(edge[0]) or not self.has_vertex(edge[1]):
             return
 
         return edge[1] == edge[0].get_neighbor_by_name(edge[1].name)
@@ -105,315 +237,175 @@ class GraphAdjList:
                 return False
         return True
 
-    def euler_cycle(self):
-        graph = deepcopy(self)
-
-        for node in graph.nodes:
-            if node.degree() % 2 != 0:
-                return []
-
-        result_path = deque()
-        path = deque()
-        current_node = graph.nodes[0]
-        path.append(current_node)
-
-        while graph.order() == 0:
-            while current_node.degree() == 0:
-                result_path.append(current_node)
-                path.pop()
-                graph.remove_vertex(current_node)
-                current_node = path[-1]
+    def euler_path(self, directed=False):
+        """
+        returns nodes of euler cycle if it exists, of euler path otherwise,
+        empty list if there is neither; graph is not changed
+        """
+        return [self.nodes[i] for i in euler_path(self.to_csr(), directed)]
 
-            next_node = current_node.get_neighbors()[0][0]
-            graph.remove_double_edge((current_node, next_node))
-            current_node = next_node
-            path.append(current_node)
+    def euler_cycle(self, directed=False):
+        path = self.euler_path(directed)
+        if not path or path[0] != path[-1]:
+            return []
+        return path
 
-        return result_path
+    def _set_marks(self, marks, parents):
+        for node, mark, parent in zip(self.nodes, marks.tolist(), parents.tolist()):
+            node.set_mark(mark)
+            node.set_marker(self.nodes[parent] if parent != -1 else None)
 
     def width_bypass(self, start_node=None):
+        start = 0 if start_node is None else self.index_of(start_node)
+        levels, parents, components = breadth_first_search(self.to_csr(), start)
 
-        self._number_connected_components = 1
-        for node in self.nodes:
-            node.set_mark(None)
-            node.set_marker(None)
-
-        start_node = start_node or self.nodes[0]
-        mark = 0
-        start_node.set_mark(mark)
-
-        queue = deque()
-        queue.append(start_node)
-
-        number_marked_nodes = 1
-        while number_marked_nodes < len(self.nodes):
-            node = queue[0]
-            for neighbor, _ in node.get_neighbors():
-                if neighbor not in queue:
-                    if not neighbor.is_marked():
-                        queue.append(neighbor)
-                        neighbor.set_mark((0 if not node.is_marked() else node.get_mark()) + 1)
-                        number_marked_nodes += 1
-            queue.popleft()
-            if not queue:
-                for node in self.nodes:
-                    if not node.is_marked():
-                        self._number_connected_components += 1
-                        node.set_mark(0)
-                        queue.append(node)
-                        number_marked_nodes += 1
-                        break
+        self._number_connected_components = number_of_components(components)
+        self._set_marks(levels, parents)
+
+        return levels, parents, components
 
     def number_of_connected_components(self):
+        if self._tracking_components:
+            return self._component_index().count
         self.width_bypass()
         return self._number_connected_components
 
     def is_connected(self):
         return self.number_of_connected_components() == 1
 
+    def are_connected(self, first_node, second_node):
+        """
+        checks if nodes are in one connected component (edges are taken as undirected)
+        """
+        return self._component_index().connected(self.index_of(first_node), self.index_of(second_node))
+
     def is_bipartite(self):
-        first_segment = []
-        second_segment = []
+        csr_graph = self.to_csr()
+        levels, parents, _ = breadth_first_search(csr_graph)
+        sides = bipartition(csr_graph, levels)
 
-        for node in self.nodes:
-            node.set_mark(None)
-            node.set_marker(None)
-
-        start_node = self.nodes[0]
-        start_node.set_mark(0)
-
-        queue = deque()
-        queue.append(start_node)
-
-        number_marked_nodes = 1
-        while number_marked_nodes < len(self.nodes):
-            node = queue[0]
-            for neighbor, _ in node.get_neighbors():
-                if neighbor not in queue:
-                    if not neighbor.is_marked():
-                        queue.append(neighbor)
-                        neighbor.set_mark(int(node.get_mark() == 0))
-                        number_marked_nodes += 1
-                    else:
-                        if neighbor.get_mark() == node.get_mark():
-                            return False, []
-            queue.popleft()
-            if not queue:
-                for node in self.nodes:
-                    if not node.is_marked():
-                        node.set_mark(int(node.get_mark() == 0))
-                        queue.append(node)
-                        number_marked_nodes += 1
-                        break
-        for node in self.nodes:
-            if node.get_mark() == 0:
-                first_segment.append(node)
-            else:
-                second_segment.append(node)
+        if sides is None:
+            return False, []
+
+        self._set_marks(sides, parents)
+        first_segment = [node for node, side in zip(self.nodes, sides.tolist()) if side == 0]
+        second_segment = [node for node, side in zip(self.nodes, sides.tolist()) if side == 1]
 
         return True, [first_segment, second_segment]
 
     def has_cycle(self):
-        for node in self.nodes:
-            node.set_mark(None)
-            node.set_marker(None)
-
-        start_node = self.nodes[0]
-        start_node.set_mark(0)
-
-        queue = deque()
-        queue.append(start_node)
-
-        number_marked_nodes = 1
-        while number_marked_nodes < len(self.nodes):
-            node = queue[0]
-            for neighbor, _ in node.get_neighbors():
-                if neighbor not in queue:
-                    if not neighbor.is_marked():
-                        queue.append(neighbor)
-                        neighbor.set_mark(int(node.get_mark() == 0))
-                        neighbor.set_marker(node)
-                        number_marked_nodes += 1
-                    else:
-                        if node.marker_node != neighbor:
-                            return True
-            queue.popleft()
-            if not queue:
-                for node in self.nodes:
-                    if not node.is_marked():
-                        node.set_mark(int(node.get_mark() == 0))
-                        queue.append(node)
-                        number_marked_nodes += 1
-                        break
-        return False
-
-    def kruskal(self):
-        node_list = [Node() for _ in range(self.order())]
-        spanning_tree = GraphAdjList(node_list)
-
-        edges = self.get_ordered_edges(self.get_edges())
-
-        [(spanning_tree.nodes[i].set_mark(i), self.nodes[i].set_mark(i)) for i in range(spanning_tree.order())]
-
-        if len(edges) // 2 + 1 < len(self.nodes):
-            return []
+        csr_graph = self.to_csr()
+        levels, parents, _ = breadth_first_search(csr_graph)
+        self._set_marks(levels % 2, parents)
+
+        return has_non_tree_edge(csr_graph, parents)
 
-        counter_edges = 0
-        while counter_edges < spanning_tree.order() - 1:
-            edge = edges[0]
-            edge_components = [edge[0][0].get_mark(), edge[0][1].get_mark()]
-            if edge_components[0] != edge_components[1]:
-                counter_edges += 1
-                spanning_tree.add_double_edge((edge[0][0], edge[0][1]))
-                for node in spanning_tree.nodes:
-                    if node.get_mark() == edge_components[0] or node.get_mark() == edge_components[1]:
-                        node.set_mark(min(edge_components))
-                        self.find_by_name(node.name).set_mark(min(edge_components))
+    def kruskal(self, as_edges=False):
+        """
+        returns spanning forest of minimum weight which build with kruskal's algorithm,
+        as a new graph or as list of edges ((node, node), weight) of this graph
+        """
+        csr_graph = self.to_csr()
+        sources, targets, weights = kruskal(csr_graph)
 
-            edges.pop(0)
-            edges.pop(0)
+        if as_edges:
+            return self._spanning_tree_edges(sources, targets, weights)
 
-        return spanning_tree
+        return csr_graph.tree_from_edges(sources, targets, weights).to_adj_list()
 
-    def prim(self):
+    def _spanning_tree_edges(self, sources, targets, weights):
+        return [((self.nodes[first], self.nodes[second]), weight)
+                for first, second, weight in zip(sources.tolist(), targets.tolist(), weights.tolist())]
+
+    def prim(self, as_edges=False):
         """
         returns spanning tree of minimum weight
-        which build with prim's algorithm
+        which build with prim's algorithm,
+        spanning forest if graph is not connected;
+        nodes of this graph are not marked, so it can be shared between calls
         """
-        node_list = [Node() for _ in range(self.order())]
-        spanning_tree = GraphAdjList(node_list)
+        csr_graph = self.to_csr()
+        tree_edges = prim(csr_graph)
+
+        if as_edges:
+            return self._spanning_tree_edges(*tree_edges)
 
-        start = self.nodes[0]
+        return csr_graph.tree_from_edges(*tree_edges).to_adj_list()
 
-        passed = [start]
-        start.set_mark(1)
+    def to_csr(self):
+        from graph.csr_graph import GraphCSR
 
-        while len(passed) != self.order():
+        return GraphCSR.from_adj_list(self)
 
-            min_weight = np.inf
-            next_node = None
-            cur_node = None
+    def shortest_paths(self, start_node=None, targets=None):
+        """
+        returns distances from start_node and predecessors on the shortest paths
+        as arrays indexed by position in self.nodes (np.inf and -1 for unreachable);
+        nodes are left untouched, for repeated queries convert once with to_csr()
+        and use graph.shortest_path.dijkstra
+        """
+        start = 0 if start_node is None else self.index_of(start_node)
+        target_indexes = None if targets is None else [self.index_of(target) for target in targets]
 
-            for node in passed:
-                for neighbor, weight in node.get_neighbors():
-                    if not neighbor.is_marked():
-                        temp_node = neighbor
-                        temp_weight = node.get_neighbor_weight_by_name(neighbor.name)
-                        if temp_weight < min_weight:
-                            cur_node = node
-                            min_weight = temp_weight
-                            next_node = temp_node
+        return dijkstra(self.to_csr(), start, target_indexes)
 
-            spanning_tree.add_double_edge((cur_node, next_node), cur_node.get_neighbor_weight_by_name(next_node.name))
-            next_node.set_mark(1)
-            passed.append(next_node)
+    def shortest_path(self, start_node, end_node):
+        start, end = self.index_of(start_node), self.index_of(end_node)
+        distances, predecessors = dijkstra(self.to_csr(), start, [end])
 
-        return spanning_tree
+        return distances[end], [self.nodes[i] for i in reconstruct_path(predecessors, start, end)]
+
+    def a_star(self, start_node, end_node, heuristic=None):
+        """
+        heuristic(node) is an admissible estimate of distance from node to end_node,
+        returns distance, nodes of the path and number of settled nodes
+        """
+        estimate = None if heuristic is None else (lambda vertex: heuristic(self.nodes[vertex]))
+        distance, path, settled = a_star(self.to_csr(), self.index_of(start_node), self.index_of(end_node), estimate)
+
+        return distance, [self.nodes[i] for i in path], settled
+
+    def bidirectional_shortest_path(self, start_node, end_node):
+        distance, path, settled = bidirectional_dijkstra(self.to_csr(), self.index_of(start_node),
+                                                         self.index_of(end_node))
+
+        return distance, [self.nodes[i] for i in path], settled
+
+    def distances(self, sources, processes=None):
+        """
+        distance matrix block: row i holds distances from sources[i] to all nodes,
+        see graph.parallel.multi_source_distances; nodes are left untouched
+        """
+        return multi_source_distances(self.to_csr(), [self.index_of(source) for source in sources], processes)
 
     def dijkstra(self, start_node=None):
+        distances, predecessors = self.shortest_paths(start_node)
 
-        unseen_nodes = self.nodes.copy()
-        marked_names = []
-
-        while unseen_nodes:
-            min_distance_node = None
-
-            for node in unseen_nodes:
-                if min_distance_node is None:
-                    min_distance_node = node
-                elif node.get_mark() is not None and \
-                        min_distance_node is not None and \
-                        node.get_mark() < min_distance_node.get_mark():
-                    min_distance_node = node
-
-            for neighbor, weight in min_distance_node.get_neighbors():
-                if neighbor.name in marked_names:
-                    continue
-                if not neighbor.is_marked() or \
-                        weight + (0 if not min_distance_node.is_marked() else min_distance_node.get_mark()) < \
-                        (0 if not neighbor.is_marked() else neighbor.get_mark()):
-                    neighbor.set_marker(min_distance_node)
-                    neighbor.set_mark(
-                        weight + (0 if not min_distance_node.is_marked() else min_distance_node.get_mark()))
-
-            marked_names.append(min_distance_node.name)
-            unseen_nodes.pop(unseen_nodes.index(min_distance_node))
-
-    def depth_first_search(self):
-        stack = [self.nodes[0]]
-        k = 0
-        #  1 --- непомеченная дуга
-        #  0 --- прямая дуга
-        # -1 --- обратная дуга
-        stack[0].set_mark(k)
-        while stack:
-            current = stack[0]
-            i = 0
-            while i < len(current.get_neighbors()):
-                if current.get_neighbors()[i][1] == 1:
-                    if current.get_neighbors()[i][0].is_marked():
-                        current.get_neighbors()[i] = (current.get_neighbors()[i][0], -1)
-                    else:
-                        k += 1
-                        stack.append(current.get_neighbors()[i][0])
-                        current.get_neighbors()[i] = (current.get_neighbors()[i][0], 0)
-                        current.get_neighbors()[i][0].set_mark(k)
-                        current.get_neighbors()[i][0].set_marker(current)
-                        current = current.get_neighbors()[i][0]
-                        i = -1
-                i += 1
-            else:
-                stack.remove(current)
+        for node, distance, predecessor in zip(self.nodes, distances.tolist(), predecessors.tolist()):
+            node.set_mark(distance if predecessor != -1 else None)
+            node.set_marker(self.nodes[predecessor] if predecessor != -1 else None)
 
-    def hron_sequence(self):
-        half_adj = self.nodes.copy()
-        names = []
-        for node in self.nodes:
-            for neighbor, _ in node.get_neighbors():
-                if neighbor.name not in names:
-                    names.append(neighbor.name)
+    def depth_first_search(self, start_node=None):
+        """
+        marks every node with its number in dfs order and its dfs parent,
+        returns discovery and finish times, parents and kinds of edges
+        (see graph.traversal.depth_first_search); neighbors and weights are not changed
+        """
+        start = 0 if start_node is None else self.index_of(start_node)
+        discovery, finish, parents, kinds = depth_first_search(self.to_csr(), start)
 
-        for name in names:
-            for node in half_adj:
-                if name == node.name:
-                    half_adj.remove(node)
+        preorder = np.empty(self.order(), dtype=np.int64)
+        preorder[np.argsort(discovery)] = np.arange(self.order())
+        self._set_marks(preorder, parents)
 
-        if not half_adj:
-            return
+        return discovery, finish, parents, kinds
 
-        stack = [half_adj[0]]
-        half_adj.remove(stack[0])
-        k = 0
-        #  1 --- непомеченная дуга
-        #  0 --- прямая дуга
-        # -1 --- обратная дуга
-        stack[0].set_mark(k)
-        order = half_adj.copy()
-        while stack or half_adj:
-            current = stack[0]
-            i = 0
-            while i < len(current.get_neighbors()):
-                if current.get_neighbors()[i][1] == 1:
-                    if current.get_neighbors()[i][0].is_marked():
-                        current.get_neighbors()[i] = (current.get_neighbors()[i][0], -1)
-                    else:
-                        k += 1
-                        stack.append(current.get_neighbors()[i][0])
-                        current.get_neighbors()[i] = (current.get_neighbors()[i][0], 0)
-                        current.get_neighbors()[i][0].set_mark(k)
-                        current.get_neighbors()[i][0].set_marker(current)
-                        current = current.get_neighbors()[i][0]
-                        i = -1
-                i += 1
-            else:
-                if current not in order:
-                    order.append(current)
-                stack.remove(current)
-
-            if not stack and half_adj:
-                stack.append(half_adj[0])
-                k += 1
-                stack[0].set_mark(k)
-                half_adj.remove(half_adj[0])
-
-        return order
+    def hron_sequence(self):
+        """
+        returns nodes in order of dfs finishing, i.e. reversed topological order,
+        None if graph has a cycle
+        """
+        order = topological_order(self.to_csr())
+        if order is None:
+            return None
+        return [self.nodes[i] for i in order.tolist()]
@@ -0,0 +1,59 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+
+def acceptor_ranks(acceptor, number_of_proposers):
+    """
+    inverse preference table: ranks[x][p] is the position of proposer p in the list of acceptor x,
+    number_of_proposers for proposers missing from the list (they are never accepted)
+    """
+    ranks = np.full((len(acceptor), number_of_proposers), number_of_proposers, dtype=np.int64)
+    for x, preferences in enumerate(acceptor):
+        ranks[x, np.asarray(preferences, dtype=np.int64)] = np.arange(len(preferences))
+    return ranks
+
+
+def stable_matching(proposor, acceptor, capacities=None):
+    """
+    proposer-optimal stable matching (gale-shapley with a queue of free proposers),
+    proposor[p] and acceptor[x] are preference lists, best first, possibly incomplete;
+    acceptor x takes up to capacities[x] proposers (1 by default), sides may differ in size
+    returns dict acceptor -> list of its proposers (best for the acceptor first),
+    sum of ranks of the matched acceptors for proposers and sum of ranks of the matched proposers
+    for acceptors; every proposal is made once, so it takes O(number of proposers * number of acceptors)
+    """
+    number_of_proposers = len(proposor)
+    ranks = acceptor_ranks(acceptor, number_of_proposers).tolist()
+    capacities = [1] * len(acceptor) if capacities is None else list(capacities)
+
+    next_choice = [0] * number_of_proposers
+    held = [[] for _ in acceptor]  # heaps of (-rank, proposer), the worst held proposer on top
+    free = deque(range(number_of_proposers))
+
+    while free:
+        proposer = free.popleft()
+        preferences = proposor[proposer]
+        if next_choice[proposer] == len(preferences):
+            continue
+        x = preferences[next_choice[proposer]]
+        next_choice[proposer] += 1
+
+        rank = ranks[x][proposer]
+        if rank == number_of_proposers:
+            free.append(proposer)
+        elif len(held[x]) < capacities[x]:
+            heapq.heappush(held[x], (-rank, proposer))
+        elif held[x] and -held[x][0][0] > rank:
+            _, rejected = heapq.heapreplace(held[x], (-rank, proposer))
+            free.append(rejected)
+        else:
+            free.append(proposer)
+
+    pairs = {x: [proposer for _, proposer in sorted(held[x], reverse=True)] for x in range(len(acceptor))}
+    # every matched proposer holds the last acceptor it proposed to
+    proposer_sum = sum(next_choice[proposer] - 1 for heap in held for _, proposer in heap)
+    acceptor_sum = sum(-rank for heap in held for rank, _ in heap)
+
+    return pairs, proposer_sum, acceptor_sum
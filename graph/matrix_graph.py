@@ -1,69 +1,172 @@
+import os
+import tempfile
+import weakref
+
 import numpy as np
-from copy import deepcopy
+
+from graph.matching import stable_matching
+from graph.shortest_path import graph_center
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
 
 class GraphAdjMatrix:
-    def __init__(self, matrix, size=0):
+    """
+    adjacency matrix kept as two separate arrays: boolean adjacency mask and weights,
+    both are allocated with spare capacity so adding vertices does not copy them every time;
+    with directory the arrays (and the successor matrix of floid) are numpy.memmap files
+    created in that directory, so the graph is not limited by the size of RAM;
+    a file is removed together with its array (when it is replaced, garbage collected or on close)
+    """
+
+    ROWS_PER_CHUNK = 2 ** 22  # number of cells processed at once when streaming rows
+
+    def __init__(self, matrix, size=0, dtype=np.float64, directory=None):
         self._inquiry = []
         self.size = size
-        self.matrix = np.zeros((self.size, self.size),
-                               dtype=({
-                                   'names': ['is_inc', 'weight'],
-                                   'formats': [int, float]}))
-
-        for i in range(self.size):
-            for j in range(self.size):
-                if i == j:
-                    self.matrix[i][j]['weight'] = np.inf
-                    self.matrix[i][j]['is_inc'] = 0
-                else:
-                    if matrix[i][j] == np.inf or matrix[i][j] == -np.inf:
-                        self.matrix[i][j]['weight'] = matrix[i][j]
-                        self.matrix[i][j]['is_inc'] = 0
-                    else:
-                        self.matrix[i][j]['weight'] = matrix[i][j]
-                        self.matrix[i][j]['is_inc'] = 1
+        self.directory = directory
+        self._files = []  # weakref.finalize of every memmap array, removing its file
+
+        self._weights = self._allocate((size, size), dtype, np.inf)
+        self._adjacency = self._allocate((size, size), bool, False)
+        if matrix is not None and size:
+            matrix = np.asarray(matrix, dtype=dtype)[:size, :size]
+            for rows in self._row_chunks():
+                self._weights[rows] = matrix[rows]
+                self._adjacency[rows] = np.isfinite(matrix[rows])
+        np.fill_diagonal(self._weights, np.inf)
+        np.fill_diagonal(self._adjacency, False)
+
+    @classmethod
+    def from_edges(cls, size, sources, targets, weights=None, dtype=np.float64, directory=None):
+        graph = cls(None, size, dtype, directory)
+        sources, targets = np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+        graph.weights[sources, targets] = 1 if weights is None else weights
+        graph.adjacency[sources, targets] = sources != targets
+        np.fill_diagonal(graph.weights, np.inf)
+
+        return graph
+
+    @property
+    def weights(self):
+        return self._weights[:self.size, :self.size]
+
+    @property
+    def adjacency(self):
+        return self._adjacency[:self.size, :self.size]
+
+    @property
+    def matrix(self):
+        """
+        views of both arrays in the form of former structured matrix
+        """
+        return {'is_inc': self.adjacency, 'weight': self.weights}
+
+    def capacity(self):
+        return len(self._weights)
+
+    def is_memmap(self):
+        return self.directory is not None
+
+    def _allocate(self, shape, dtype, fill):
+        """
+        array filled with fill, in RAM or in a new file of self.directory
+        """
+        if self.directory is None or 0 in shape:
+            return np.full(shape, fill, dtype=dtype)
+
+        handle, path = tempfile.mkstemp(suffix='.dat', dir=self.directory)
+        os.close(handle)
+        array = np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+        self._files.append(weakref.finalize(array, _remove_file, path))
+        for rows in self._row_chunks(shape[0], shape[1]):
+            array[rows] = fill
+        return array
+
+    def _release(self, *arrays):
+        """
+        removes files of arrays allocated by _allocate, the arrays must not be used after that
+        """
+        for finalizer in self._files:
+            if finalizer.alive and any(finalizer.peek()[0] is array for array in arrays):
+                finalizer()
+        self._files = [finalizer for finalizer in self._files if finalizer.alive]
+
+    def close(self):
+        """
+        removes all files of memmap graph, the graph must not be used after that
+        """
+        for finalizer in self._files:
+            finalizer()
+        self._files = []
+
+    def _row_chunks(self, rows=None, columns=None):
+        rows = self.size if rows is None else rows
+        columns = self.size if columns is None else columns
+        step = max(1, self.ROWS_PER_CHUNK // max(columns, 1))
+        return [slice(start, min(start + step, rows)) for start in range(0, rows, step)]
 
     def __setitem__(self, position, weight=1):
-        if self.matrix[position[0]][position[1]]['is_inc'] == 0:
-            self.matrix[position[0]][position[1]]['is_inc'] = 1
-        self.matrix[position[0]][position[1]]['weight'] = weight
+        self._adjacency[position[0], position[1]] = True
+        self._weights[position[0], position[1]] = weight
 
     def __getitem__(self, position):
-        return self.matrix[position[0]][position[1]]
+        return int(self._adjacency[position[0], position[1]]), float(self._weights[position[0], position[1]])
 
     def __str__(self):
         string = ""
         for i in range(self.size):
             for j in range(self.size):
-                string += "{} ".format(str(self.matrix[i][j]))
+                string += "{} ".format(str(self[i, j]))
             string += "\n"
         return string
 
+    def _reserve(self, capacity):
+        if capacity <= self.capacity():
+            return
+        weights = self._allocate((capacity, capacity), self._weights.dtype, np.inf)
+        adjacency = self._allocate((capacity, capacity), bool, False)
+        for rows in self._row_chunks():
+            weights[rows, :self.size] = self.weights[rows]
+            adjacency[rows, :self.size] = self.adjacency[rows]
+        self._release(self._weights, self._adjacency)
+        self._weights, self._adjacency = weights, adjacency
+
     def add_vertex(self):
-        self.size += 1
-        old_matrix = self.matrix.copy()
-        self.matrix = np.zeros((self.size, self.size), dtype=self.matrix.dtype)
-        self.matrix[:old_matrix.shape[0], :old_matrix.shape[1]] = old_matrix
+        if self.size == self.capacity():
+            self._reserve(max(2 * self.capacity(), 4))
 
-        for i in range(self.size):
-            self.matrix[i][-1] = (0, np.inf)
-            self.matrix[-1][i] = (0, np.inf)
+        self.size += 1
+        self._weights[self.size - 1, :self.size] = np.inf
+        self._weights[:self.size, self.size - 1] = np.inf
+        self._adjacency[self.size - 1, :self.size] = False
+        self._adjacency[:self.size, self.size - 1] = False
 
     def remove_vertex(self, vertex_num):
+        # rows and columns after the vertex are shifted in place, capacity is kept
+        size = self.size
+        for array in (self._weights, self._adjacency):
+            array[vertex_num:size - 1, :size] = array[vertex_num + 1:size, :size]
+            array[:size - 1, vertex_num:size - 1] = array[:size - 1, vertex_num + 1:size]
         self.size -= 1
-        old_matrix = self.matrix.copy()
-        self.matrix = np.zeros((self.size, self.size), dtype=self.matrix.dtype)
-        for i in range(self.size + 1):
-            for j in range(self.size + 1):
-                if i < vertex_num and j < vertex_num:
-                    self.matrix[i][j] = old_matrix[i][j]
-                elif i > vertex_num and j < vertex_num:
-                    self.matrix[i - 1][j] = old_matrix[i][j]
-                elif i < vertex_num and j > vertex_num:
-                    self.matrix[i][j - 1] = old_matrix[i][j]
-                elif i > vertex_num and j > vertex_num:
-                    self.matrix[i - 1][j - 1] = old_matrix[i][j]
+
+    def remove_vertices(self, vertices):
+        """
+        removes all vertices at once with a single compaction of the arrays,
+        remaining vertices keep their relative order
+        """
+        keep = np.ones(self.size, dtype=bool)
+        keep[np.asarray(vertices, dtype=np.int64)] = False
+        keep = np.flatnonzero(keep)
+
+        for array in (self._weights, self._adjacency):
+            array[:len(keep), :len(keep)] = array[np.ix_(keep, keep)]
+        self.size = len(keep)
 
     def add_edge(self, edge, weight):
         if edge[0] >= self.size or edge[1] >= self.size:
@@ -83,14 +186,14 @@ class GraphAdjMatrix:
             return
 
         if self.is_adjacent(edge):
-            self.matrix[edge[0]][edge[1]]['weight'] = np.inf
-            self.matrix[edge[0]][edge[1]]['is_inc'] = 0
+            self._weights[edge[0], edge[1]] = np.inf
+            self._adjacency[edge[0], edge[1]] = False
 
     def get_cycle_weight(self, cycle):
-        return sum([self.matrix[cycle[i - 1]][cycle[i]]['weight'] for i in range(len(cycle))])
+        return sum([self._weights[cycle[i - 1], cycle[i]] for i in range(len(cycle))])
 
     def get_graph_weight(self):
-        return sum(sum([*self.matrix['weight']])) / 2
+        return self.weights.sum() / 2
 
     def is_adjacent(self, edge):
 
@@ -98,94 +201,186 @@ class GraphAdjMatrix:
             print("return")
             return
 
-        return self.matrix[edge[0]][edge[1]]['is_inc'] == 1
+        return bool(self._adjacency[edge[0], edge[1]])
 
     def get_neighbors(self, vertex_num):
-        neighbors = []
+        return np.flatnonzero(self.adjacency[vertex_num]).tolist()
 
-        for i in range(self.size):
-            if self.is_adjacent((vertex_num, i)):
-                neighbors.append(i)
-
-        return neighbors
+    def neighbors_of(self, vertices):
+        """
+        returns array of neighbors for every vertex of vertices
+        """
+        rows = self.adjacency[np.asarray(vertices, dtype=np.int64)]
+        _, neighbors = np.nonzero(rows)
+        return np.split(neighbors, np.cumsum(rows.sum(axis=1))[:-1])
 
-    def floid(self):
-        inquiry = [[i + 1 for i in range(self.size)] for _ in range(self.size)]
+    @staticmethod
+    def _relax(weights, inquiry, rows, columns, k, hops=None):
+        candidates = weights[rows, k][:, None] + weights[k, columns][None, :]
+        improved = candidates < weights[rows, columns]
+        if hops is not None:
+            # equal distance with fewer edges also counts, see _blocked_floid
+            candidate_hops = hops[rows, k][:, None] + hops[k, columns][None, :]
+            improved |= (candidates == weights[rows, columns]) & np.isfinite(candidates) & \
+                (candidate_hops < hops[rows, columns])
+            np.copyto(hops[rows, columns], candidate_hops, where=improved)
+        np.copyto(weights[rows, columns], candidates, where=improved)
+        np.copyto(inquiry[rows, columns], inquiry[rows, k][:, None].copy(), where=improved)
 
-        for k in range(self.size):
-            for i in range(self.size):
-                for j in range(self.size):
-                    if self.matrix[i][j]['weight'] > self.matrix[i][k]['weight'] + self.matrix[k][j]['weight']:
-                        inquiry[i][j] = inquiry[i][k]
-                        self.matrix[i][j]['weight'] = self.matrix[i][k]['weight'] + self.matrix[k][j]['weight']
+    @staticmethod
+    def _relax_by_block(weights, inquiry, hops, rows, columns, block):
+        # min-plus product of panels, which are final for the block at this point,
+        # ties of distance go to the path with fewer edges
+        candidates = weights[rows, block][:, :, None] + weights[block, columns][None, :, :]
+        candidate_hops = hops[rows, block][:, :, None] + hops[block, columns][None, :, :]
+        best_weights = candidates.min(axis=1)
+        shortest = candidates == best_weights[:, None, :]
+        best = np.where(shortest, candidate_hops, np.iinfo(hops.dtype).max).argmin(axis=1)
+        best_hops = np.take_along_axis(candidate_hops, best[:, None, :], axis=1)[:, 0, :]
+
+        improved = (best_weights < weights[rows, columns]) | \
+            ((best_weights == weights[rows, columns]) & np.isfinite(best_weights) & (best_hops < hops[rows, columns]))
+        np.copyto(weights[rows, columns], best_weights, where=improved)
+        np.copyto(hops[rows, columns], best_hops, where=improved)
+        np.copyto(inquiry[rows, columns], np.take_along_axis(inquiry[rows, block], best, axis=1), where=improved)
 
+    @staticmethod
+    def _blocked_floid(weights, inquiry, hops, block_size):
+        """
+        tiles take distances through a whole block at once, so with zero-weight cycles successors
+        chosen at different steps could form a cycle; distances are compared together with
+        numbers of edges (hops), which strictly decrease along successors
+        """
+        size = len(weights)
+        blocks = [slice(start, min(start + block_size, size)) for start in range(0, size, block_size)]
+        everything = slice(None)
+
+        for block in blocks:
+            for k in range(block.start, block.stop):
+                GraphAdjMatrix._relax(weights, inquiry, block, everything, k, hops)
+                GraphAdjMatrix._relax(weights, inquiry, everything, block, k, hops)
+
+            for rows in blocks:
+                for columns in blocks:
+                    if rows != block and columns != block:
+                        GraphAdjMatrix._relax_by_block(weights, inquiry, hops, rows, columns, block)
+
+    def floid(self, block_size=None):
+        """
+        all pairs shortest paths, weights are replaced with distances,
+        _inquiry[i][j] - 1 is the next vertex on the way from i to j;
+        every step is vectorized over the whole matrix or, with block_size,
+        over tiles of block_size x block_size;
+        memmap graph is processed in place by tiles (of 256 unless block_size is given)
+        """
+        if self.is_memmap():
+            weights = self.weights
+            block_size = block_size or 256
+        else:
+            weights = np.array(self.weights, dtype=np.float64)
+
+        index_dtype = np.int32 if self.size < np.iinfo(np.int32).max else np.int64
+        inquiry = self._allocate((self.size, self.size), index_dtype, 0)
+        for rows in self._row_chunks():
+            inquiry[rows] = np.arange(1, self.size + 1)
+
+        if block_size is None:
+            everything = slice(None)
+            for k in range(self.size):
+                self._relax(weights, inquiry, everything, everything, k)
+        else:
+            hops = self._allocate((self.size, self.size), index_dtype, 1)
+            self._blocked_floid(weights, inquiry, hops, block_size)
+            self._release(hops)
+
+        if not self.is_memmap():
+            self.weights[...] = weights
+        self._release(self._inquiry)
         self._inquiry = inquiry
 
-    def place_station(self):
-        graph = deepcopy(self)
-
-        for i in range(graph.size):
-            for j in range(i, graph.size):
-                min_value = min(graph.matrix[i][j]['weight'], graph.matrix[j][i]['weight'])
-                graph.matrix[i][j]['weight'] = min_value
-                graph.matrix[j][i]['weight'] = min_value
-                graph.matrix[i][j]['is_inc'] = 1
-                graph.matrix[i][j]['is_inc'] = 1
-
-        graph.floid()
-
-        print(graph.matrix['weight'])
-
-        def minimum_sum(matrix, size):
-            min_index = 0
-            max_min = np.inf
-            for i in range(size):
-                temp_max = -np.inf
-                for j in range(size):
-                    if i != j:
-                        if matrix[i][j] > temp_max:
-                            temp_max = matrix[i][j]
-                if temp_max < max_min:
-                    max_min = temp_max
-                    min_index = i
-            return min_index
-
-        return minimum_sum(graph.matrix['weight'], graph.size)
+    def get_path(self, start, end):
+        """
+        path from start to end restored from _inquiry after floid,
+        empty list if there is no path
+        """
+        if start == end:
+            return [start]
+        if len(self._inquiry) == 0 or self._weights[start, end] == np.inf:
+            return []
+
+        path = [start]
+        while path[-1] != end and len(path) <= self.size:
+            path.append(int(self._inquiry[path[-1]][end]) - 1)
+
+        # path longer than number of vertices walks around a negative cycle
+        return path if path[-1] == end else []
+
+    def symmetric(self):
+        """
+        new graph with the same storage where every edge goes both ways
+        with the smaller weight of two directions
+        """
+        graph = GraphAdjMatrix(None, self.size, self._weights.dtype, self.directory)
+        for rows in self._row_chunks():
+            graph.weights[rows] = np.minimum(self.weights[rows], self.weights[:, rows].T)
+            graph.adjacency[rows] = np.isfinite(graph.weights[rows])
+        return graph
+
+    def eccentricities(self):
+        """
+        greatest distance from every vertex, computed from weights after floid by streaming rows
+        """
+        result = np.empty(self.size)
+        for rows in self._row_chunks():
+            distances = np.array(self.weights[rows], dtype=np.float64)
+            distances[np.arange(rows.stop - rows.start), np.arange(rows.start, rows.stop)] = -np.inf
+            result[rows] = distances.max(axis=1) if self.size > 1 else 0
+        return result
+
+    def to_csr(self, undirected=False):
+        """
+        graph in csr form, with undirected every edge is added in both directions
+        """
+        from graph.csr_graph import GraphCSR
+
+        sources, targets = np.nonzero(self.adjacency)
+        weights = self.weights[sources, targets]
+        if undirected:
+            sources, targets = np.concatenate((sources, targets)), np.concatenate((targets, sources))
+            weights = np.concatenate((weights, weights))
+
+        return GraphCSR.from_edges(self.size, sources, targets, weights)
+
+    def center(self, method='floid', block_size=None):
+        """
+        center of the graph (vertex with minimal eccentricity) with directions of edges ignored
+        and its eccentricity; method 'floid' finds all distances (see floid and place_station),
+        'dijkstra' runs heap dijkstra only from vertices which can still be the center,
+        which is much faster for sparse graphs; the graph itself is not changed
+        """
+        if self.size == 0:
+            return 0, 0.0
+        if method == 'dijkstra':
+            return graph_center(self.to_csr(undirected=True))
+        if method != 'floid':
+            raise ValueError("unknown method {}".format(method))
+
+        graph = self.symmetric()
+        try:
+            graph.floid(block_size)
+            eccentricities = graph.eccentricities()
+        finally:
+            graph.close()
+        center = int(np.argmin(eccentricities))
+
+        return center, float(eccentricities[center])
+
+    def place_station(self, block_size=None, method='floid'):
+        return self.center(method, block_size)[0]
 
     @staticmethod
-    def gale_shapley(proposor, acceptor):
-
-        pairs = {i: [] for i in range(len(proposor))}
-
-        def has_empty(list_):
-            flag = True
-            for i in range(len(list_)):
-                flag = flag and list_[i] != []
-
-            return flag
-
-        indexes_prop = [0 for _ in range(len(proposor))]
-        marked_props = []
-        while not has_empty(pairs):
-            for i in range(len(pairs)):
-                if i not in marked_props:
-                    pairs[proposor[i][indexes_prop[i]]].append(i)
-                    indexes_prop[i] += 1
-                    marked_props.append(i)
-
-            for i in range(len(pairs)):
-                if len(pairs[i]) > 1:
-                    best_proposor, best_priority = None, len(pairs)
-                    for j in range(len(pairs[i])):
-                        prop_prior = acceptor[i].index(pairs[i][j])
-                        if prop_prior < best_priority:
-                            best_proposor, best_priority = pairs[i][j], prop_prior
-
-                    while len(pairs[i]) != 1:
-                        for x in pairs[i]:
-                            if x != best_proposor:
-                                pairs[i].remove(x)
-                                marked_props.remove(x)
-
-        return pairs, sum(proposor[pairs[x][0]].index(x) for x in pairs), \
-                      sum(acceptor[x].index(pairs[x][0]) for x in pairs)
+    def gale_shapley(proposor, acceptor, capacities=None):
+        """
+        stable matching, see graph.matching.stable_matching
+        """
+        return stable_matching(proposor, acceptor, capacities)
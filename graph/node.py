@@ -1,5 +1,8 @@
 class Node:
-    def __init__(self, name: str = "", number=None, neighbors=None):  # multi (name, weight) in set
+    __slots__ = ('name', 'number', 'neighbors', 'mark', 'marker_node', '_positions', '_sources')
+
+    def __init__(self, name="", number=None, neighbors=None):  # multi (name, weight) in set
+        # name is a string or an integer id (see GraphAdjList integer-id mode)
         if neighbors is None:
             neighbors = []
         self.name = name
@@ -7,6 +10,9 @@ class Node:
         self.neighbors = neighbors
         self.mark = None
         self.marker_node = None
+        self._positions = None  # neighbor name -> position of its first edge in neighbors, built lazily
+        self._sources = None  # id(node) -> node for nodes which may have an edge to this one
+        self.reindex_neighbors()
 
     def __str__(self):
         string = "Node["
@@ -24,29 +30,76 @@ class Node:
         return string + "]"
 
     def __eq__(self, node):
-        if self is None or node is None:
+        if self is node:
+            return True
+        if node is None:
             return False
         if type(node) == type(tuple()):
             return self.name == node[0].name
         return self.name == node.name
 
+    def __hash__(self):
+        # consistent with __eq__, so a node must not be renamed while it is in a set or a dict
+        return hash(self.name)
+
     def get_neighbors(self):
         return self.neighbors
 
     def get_neighbors_names(self):
         return {node.name for node, _ in self.neighbors}
 
+    def reindex_neighbors(self):
+        self._positions = {} if self.neighbors else None
+        for position, (neighbor, _) in enumerate(self.neighbors):
+            if self._positions.setdefault(neighbor.name, position) == position:
+                neighbor._add_source(self)
+
+    def _add_source(self, node):
+        if self._sources is None:
+            self._sources = {}
+        self._sources[id(node)] = node
+
+    def _discard_source(self, node):
+        if self._sources is not None:
+            self._sources.pop(id(node), None)
+
+    def get_sources(self):
+        """
+        nodes with an edge to this node (reverse adjacency)
+        """
+        if self._sources is None:
+            return []
+        # neighbors of a node can be replaced directly, so entries are checked
+        return [node for node in self._sources.values() if node.get_neighbor_by_name(self.name) is self]
+
+    def add_neighbor(self, neighbor, weight=1):
+        if self._positions is None:
+            self._positions = {}
+        self._positions.setdefault(neighbor.name, len(self.neighbors))
+        self.neighbors.append((neighbor, weight))
+        if neighbor._sources is None:
+            neighbor._sources = {}
+        neighbor._sources[id(self)] = self
+
+    def remove_neighbor(self, name):
+        """
+        removes all edges to the neighbor with given name, O(degree)
+        """
+        if self._positions is None or name not in self._positions:
+            return
+        self.neighbors[self._positions[name]][0]._discard_source(self)
+        self.neighbors[:] = [neighbor for neighbor in self.neighbors if neighbor[0].name != name]
+        self._positions = {} if self.neighbors else None
+        for position, (neighbor, _) in enumerate(self.neighbors):
+            self._positions.setdefault(neighbor.name, position)
+
     def get_neighbor_by_name(self, name):
-        for neighbor in self.neighbors:
-            if neighbor[0].name == name:
-                return neighbor[0]
-        return None
+        position = None if self._positions is None else self._positions.get(name)
+        return None if position is None else self.neighbors[position][0]
 
     def get_neighbor_weight_by_name(self, name):
-        for neighbor in self.neighbors:
-            if neighbor[0].name == name:
-                return neighbor[1]
-        return None
+        position = None if self._positions is None else self._positions.get(name)
+        return None if position is None else self.neighbors[position][1]
 
     def degree(self):
         return len(self.get_neighbors())
@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from graph.shortest_path import dijkstra
+
+_graph = None  # graph of the worker process, built over shared memory
+_distances = None  # shared output block of the worker process
+_blocks = []  # shared memory blocks attached by the worker process
+
+
+def share_array(array):
+    """
+    copy of array in a new shared memory block, returns the block and its description
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def attach_array(description):
+    """
+    array over shared memory block described by share_array, the block stays attached
+    until the process exits
+    """
+    name, shape, dtype = description
+    block = shared_memory.SharedMemory(name=name)
+    _blocks.append(block)
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _init_worker(offsets, targets, weights, distances):
+    from graph.csr_graph import GraphCSR
+
+    global _graph, _distances
+    # dtypes of shared arrays are those of GraphCSR, so the arrays are used without copying
+    _graph = GraphCSR(attach_array(offsets), attach_array(targets), attach_array(weights))
+    _distances = attach_array(distances)
+
+
+def _fill_rows(task):
+    start, sources = task
+    for row, source in enumerate(sources, start):
+        _distances[row] = dijkstra(_graph, source)[0]
+
+
+def multi_source_distances(graph, sources, processes=None, chunk_size=None):
+    """
+    distances from every source in graph in csr form (graph.csr_graph.GraphCSR)
+    as len(sources) x graph.order() matrix, np.inf for unreachable vertices;
+    sources are split into chunks which are solved by a pool of processes,
+    arrays of the graph and the result are kept in shared memory, so nothing
+    but the chunks of sources is sent to the workers
+    """
+    sources = [int(source) for source in sources]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(sources) <= 1:
+        distances = np.empty((len(sources), graph.order()))
+        for row, source in enumerate(sources):
+            distances[row] = dijkstra(graph, source)[0]
+        return distances
+
+    chunk_size = chunk_size or max(1, -(-len(sources) // (4 * processes)))
+    tasks = [(start, sources[start:start + chunk_size]) for start in range(0, len(sources), chunk_size)]
+
+    blocks = []
+    try:
+        descriptions = []
+        for array in (graph.offsets, graph.targets, graph.weights, np.empty((len(sources), graph.order()))):
+            block, description = share_array(array)
+            blocks.append(block)
+            descriptions.append(description)
+
+        with multiprocessing.Pool(processes, _init_worker, descriptions) as pool:
+            pool.map(_fill_rows, tasks)
+
+        return np.ndarray((len(sources), graph.order()), dtype=np.float64, buffer=blocks[-1].buf).copy()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
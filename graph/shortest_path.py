@@ -0,0 +1,200 @@
+import heapq
+
+import numpy as np
+
+
+def dijkstra(graph, source, targets=None, limit=np.inf):
+    """
+    heap dijkstra over graph in csr form (graph.csr_graph.GraphCSR)
+    returns distances from source and predecessors on the shortest paths,
+    np.inf and -1 for vertices which were not settled;
+    if targets are given search stops as soon as all of them are settled,
+    vertices farther than limit are not settled
+    """
+    offsets, adjacency, weights = graph.offsets, graph.targets, graph.weights
+    remaining = None if targets is None else set(targets)
+
+    distances = {source: 0.0}
+    predecessors = {}
+    settled = set()
+
+    heap = [(0.0, source)]
+    while heap:
+        distance, vertex = heapq.heappop(heap)
+        if vertex in settled:
+            continue
+        if distance > limit:
+            break
+        settled.add(vertex)
+
+        if remaining is not None:
+            remaining.discard(vertex)
+            if not remaining:
+                break
+
+        begin, end = offsets[vertex], offsets[vertex + 1]
+        for neighbor, weight in zip(adjacency[begin:end].tolist(), weights[begin:end].tolist()):
+            new_distance = distance + weight
+            if new_distance < distances.get(neighbor, np.inf):
+                distances[neighbor] = new_distance
+                predecessors[neighbor] = vertex
+                heapq.heappush(heap, (new_distance, neighbor))
+
+    vertices = list(settled)
+    result_distances = np.full(graph.order(), np.inf)
+    result_predecessors = np.full(graph.order(), -1, dtype=np.int64)
+    result_distances[vertices] = [distances[vertex] for vertex in vertices]
+    result_predecessors[vertices] = [predecessors.get(vertex, -1) for vertex in vertices]
+
+    return result_distances, result_predecessors
+
+
+def graph_center(graph):
+    """
+    vertex of minimal eccentricity and its eccentricity for undirected graph in csr form
+    (every edge stored in both directions), dijkstra is run only from vertices which can
+    still beat the best one; after a search from u
+    max(d(u, v), ecc(u) - d(u, v)) <= ecc(v) <= ecc(u) + d(u, v),
+    sources alternate between the smallest lower bound (likely center) and
+    the largest upper bound (likely periphery, which gives the best lower bounds);
+    ties go to the smallest index, (0, np.inf) for a disconnected graph
+    """
+    order = graph.order()
+    if order == 0:
+        return 0, 0.0
+
+    indexes = np.arange(order)
+    lower_bounds = np.zeros(order)
+    upper_bounds = np.full(order, np.inf)
+    done = np.zeros(order, dtype=bool)
+    best, best_eccentricity = 0, np.inf
+
+    periphery = False
+    while True:
+        candidates = np.flatnonzero(~done & ((lower_bounds < best_eccentricity) |
+                                             ((lower_bounds == best_eccentricity) & (indexes < best))))
+        if not len(candidates):
+            break
+        if periphery:
+            vertex = int(candidates[np.argmax(upper_bounds[candidates])])
+        else:
+            vertex = int(candidates[np.argmin(lower_bounds[candidates])])
+        done[vertex] = True
+
+        # search from a likely center is cut as soon as it is known to be worse than the best one
+        distances, _ = dijkstra(graph, vertex, limit=np.inf if periphery else best_eccentricity)
+        periphery = not periphery
+        reached = np.isfinite(distances)
+        if not reached.all():
+            if best_eccentricity == np.inf:
+                return 0, np.inf
+            np.maximum(lower_bounds, np.where(reached, distances, 0), out=lower_bounds)
+            continue
+
+        eccentricity = float(distances.max())
+        np.maximum(lower_bounds, np.maximum(distances, eccentricity - distances), out=lower_bounds)
+        np.minimum(upper_bounds, eccentricity + distances, out=upper_bounds)
+        if eccentricity < best_eccentricity or (eccentricity == best_eccentricity and vertex < best):
+            best, best_eccentricity = vertex, eccentricity
+
+    return best, best_eccentricity
+
+
+def _walk(predecessors, vertex):
+    path = [vertex]
+    while predecessors[path[-1]] != -1:
+        path.append(predecessors[path[-1]])
+    return path
+
+
+def a_star(graph, source, target, heuristic=None):
+    """
+    point-to-point search over graph in csr form (graph.csr_graph.GraphCSR),
+    heuristic(vertex) is an admissible estimate of distance from vertex to target,
+    without heuristic it is dijkstra stopped at target
+    returns distance, list of vertices of the path and number of settled vertices,
+    (np.inf, [], settled) if target is unreachable
+    """
+    offsets, adjacency, weights = graph.offsets, graph.targets, graph.weights
+
+    distances = {source: 0.0}
+    predecessors = {source: -1}
+    settled = set()
+
+    heap = [(0.0 if heuristic is None else heuristic(source), 0.0, source)]
+    while heap:
+        _, distance, vertex = heapq.heappop(heap)
+        # stale entry, vertex is reopened only if the heuristic is not consistent
+        if distance > distances[vertex]:
+            continue
+        settled.add(vertex)
+        if vertex == target:
+            return distance, _walk(predecessors, target)[::-1], len(settled)
+
+        begin, end = offsets[vertex], offsets[vertex + 1]
+        for neighbor, weight in zip(adjacency[begin:end].tolist(), weights[begin:end].tolist()):
+            new_distance = distance + weight
+            if new_distance < distances.get(neighbor, np.inf):
+                distances[neighbor] = new_distance
+                predecessors[neighbor] = vertex
+                estimate = new_distance if heuristic is None else new_distance + heuristic(neighbor)
+                heapq.heappush(heap, (estimate, new_distance, neighbor))
+
+    return np.inf, [], len(settled)
+
+
+def bidirectional_dijkstra(graph, source, target, reverse=None):
+    """
+    point-to-point dijkstra run from source over graph and from target over reversed graph
+    (graph.reverse(), pass it as reverse to reuse between queries) until the searches meet
+    returns distance, list of vertices of the path and number of settled vertices of both searches,
+    (np.inf, [], settled) if target is unreachable
+    """
+    graphs = (graph, graph.reverse() if reverse is None else reverse)
+    distances = ({source: 0.0}, {target: 0.0})
+    predecessors = ({source: -1}, {target: -1})
+    heaps = ([(0.0, source)], [(0.0, target)])
+    settled = 0
+
+    best, meeting = (0.0, source) if source == target else (np.inf, None)
+    while heaps[0] and heaps[1]:
+        # no path through unsettled vertices can be shorter than the best one found
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        distance, vertex = heapq.heappop(heaps[side])
+        if distance > distances[side][vertex]:
+            continue
+        settled += 1
+
+        own, other = distances[side], distances[1 - side]
+        offsets, adjacency, weights = graphs[side].offsets, graphs[side].targets, graphs[side].weights
+        begin, end = offsets[vertex], offsets[vertex + 1]
+        for neighbor, weight in zip(adjacency[begin:end].tolist(), weights[begin:end].tolist()):
+            new_distance = distance + weight
+            if new_distance < own.get(neighbor, np.inf):
+                own[neighbor] = new_distance
+                predecessors[side][neighbor] = vertex
+                heapq.heappush(heaps[side], (new_distance, neighbor))
+            if neighbor in other and own[neighbor] + other[neighbor] < best:
+                best, meeting = own[neighbor] + other[neighbor], neighbor
+
+    if meeting is None:
+        return np.inf, [], settled
+
+    return best, _walk(predecessors[0], meeting)[::-1] + _walk(predecessors[1], meeting)[1:], settled
+
+
+def reconstruct_path(predecessors, source, target):
+    """
+    returns list of vertices from source to target,
+    empty list if target is unreachable
+    """
+    path = [target]
+    while path[-1] != source:
+        predecessor = int(predecessors[path[-1]])
+        if predecessor == -1:
+            return []
+        path.append(predecessor)
+
+    return path[::-1]
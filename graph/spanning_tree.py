@@ -0,0 +1,70 @@
+import heapq
+
+import numpy as np
+
+from graph.disjoint_set import DisjointSet
+
+
+def kruskal(graph, deduplicate=True):
+    """
+    kruskal's algorithm over graph in csr form (graph.csr_graph.GraphCSR),
+    edges are sorted once and components are merged with disjoint sets;
+    with deduplicate only the lightest of the edges between a pair of vertices
+    (in any direction) is considered and loops are dropped
+    returns sources, targets and weights of the edges of minimum spanning forest
+    """
+    sources, targets, weights = graph.get_sources(), graph.targets, graph.weights
+    positions = np.argsort(weights, kind='stable')
+
+    if deduplicate:
+        positions = positions[sources[positions] != targets[positions]]
+        low = np.minimum(sources[positions], targets[positions]).astype(np.int64)
+        high = np.maximum(sources[positions], targets[positions]).astype(np.int64)
+        _, first_positions = np.unique(low * graph.order() + high, return_index=True)
+        positions = positions[np.sort(first_positions)]
+
+    components = DisjointSet(graph.order())
+    tree = []
+    for position, first, second in zip(positions.tolist(),
+                                       sources[positions].tolist(),
+                                       targets[positions].tolist()):
+        if components.union(first, second):
+            tree.append(position)
+            if len(tree) == graph.order() - 1:
+                break
+
+    tree = np.array(tree, dtype=np.int64)
+    return sources[tree], targets[tree], weights[tree]
+
+
+def prim(graph):
+    """
+    prim's algorithm with a binary heap over graph in csr form (graph.csr_graph.GraphCSR),
+    every component is grown from its first vertex, so disconnected graph gives a forest
+    returns sources, targets and weights of the edges of minimum spanning forest
+    """
+    offsets, adjacency, weights = graph.offsets, graph.targets, graph.weights
+    passed = bytearray(graph.order())
+    tree_sources, tree_targets, tree_weights = [], [], []
+
+    for root in range(graph.order()):
+        if passed[root]:
+            continue
+        heap = [(0.0, root, -1)]
+        while heap:
+            weight, vertex, parent = heapq.heappop(heap)
+            if passed[vertex]:
+                continue
+            passed[vertex] = 1
+            if parent != -1:
+                tree_sources.append(parent)
+                tree_targets.append(vertex)
+                tree_weights.append(weight)
+
+            begin, end = offsets[vertex], offsets[vertex + 1]
+            for neighbor, neighbor_weight in zip(adjacency[begin:end].tolist(), weights[begin:end].tolist()):
+                if not passed[neighbor]:
+                    heapq.heappush(heap, (neighbor_weight, neighbor, vertex))
+
+    return np.array(tree_sources, dtype=np.int64), np.array(tree_targets, dtype=np.int64), \
+        np.array(tree_weights, dtype=np.float64)
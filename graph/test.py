@@ -1,10 +1,20 @@
+import os
+import tempfile
+
 import numpy as np
+import pytest
 
+from graph.csr_graph import GraphCSR
+from graph.disjoint_set import DisjointSet
 from graph.list_graph import GraphAdjList
 from graph.matrix_graph import GraphAdjMatrix
 from graph.node import Node
+from graph.parallel import multi_source_distances
+from graph.shortest_path import dijkstra, reconstruct_path, a_star, bidirectional_dijkstra
+from graph.traversal import breadth_first_search, TREE_EDGE, BACK_EDGE, FORWARD_EDGE, CROSS_EDGE
 
-from graph.coloring import gis, dsatur
+from graph.coloring import gis, dsatur, dsatur_colors, gis_colors, exact_colors, exact_coloring, tabucol, \
+    portfolio_colors, portfolio_coloring
 
 
 def test_get_set():
@@ -27,6 +37,24 @@ def test_get_set():
     assert graph.nodes[1] == node_list[1]
 
 
+def test_node_hash():
+    node_list = [Node('a'), Node('b'), Node('c')]
+
+    assert len({node_list[0], node_list[1], Node('a')}) == 2
+    assert Node('b') in set(node_list)
+    assert {node_list[2]: 3}[Node('c')] == 3
+
+    with pytest.raises(AttributeError):
+        node_list[0].color = 1
+
+    # nodes are hashed by name, a graph renames the nodes it is given
+    nodes = [Node(), Node()]
+    graph = GraphAdjList(nodes)
+
+    assert nodes[1] in {graph.nodes[1]}
+    assert Node() not in {graph.nodes[1]}
+
+
 def test_get_ordered_edges():
     number_nodes = 4
     node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
@@ -145,6 +173,130 @@ def test_add_vertex():
     assert graph.nodes[-1].name == chr(ord('c') + 1)
 
 
+def test_vertex_index():
+    number_nodes = 5
+    node_list = [Node() for _ in range(number_nodes)]
+
+    graph = GraphAdjList(node_list.copy())
+
+    graph.add_edges_from([('a', 'b', 2), ('b', 'c'), (node_list[2], node_list[3], 4), ('a', 'z')])
+    graph.add_edges_from([('d', 'e', 3)], double=True)
+
+    assert graph.find_by_name('c') is node_list[2]
+    assert graph.find_by_name('z') is None
+    assert node_list[0].get_neighbor_weight_by_name('b') == 2
+    assert node_list[1].get_neighbor_weight_by_name('c') == 1
+    assert node_list[2].get_neighbor_by_name('d') is node_list[3]
+    assert node_list[4].get_neighbor_weight_by_name('d') == 3
+    assert node_list[0].get_neighbor_by_name('z') is None
+
+    graph.add_vertex()
+    graph.add_edges_from([('f', 'a', 5)])
+
+    assert graph.index_of(graph.nodes[-1]) == 5
+    assert graph.find_by_name('f').get_neighbor_weight_by_name('a') == 5
+
+    graph.remove_vertex(node_list[1])
+
+    assert graph.find_by_name('b') is None
+    assert graph.index_of(node_list[2]) == 1
+    assert graph.index_of(graph.find_by_name('f')) == 4
+    assert node_list[0].get_neighbor_by_name('b') is None
+    assert node_list[0].degree() == 0
+
+
+def test_reverse_adjacency():
+    graph = GraphAdjList.of_order(5)
+    graph.add_edges_from([(0, 1, 2), (0, 1, 5), (2, 1), (1, 3), (3, 3), (4, 0)])
+
+    assert set(graph.nodes[1].get_sources()) == {graph.nodes[0], graph.nodes[2]}
+    assert graph.nodes[3].get_sources() == [graph.nodes[1], graph.nodes[3]]
+
+    graph.remove_edge((graph.nodes[0], graph.nodes[1]))
+
+    assert graph.nodes[0].degree() == 0
+    assert graph.nodes[1].get_sources() == [graph.nodes[2]]
+
+    removed = graph.nodes[3]
+    graph.remove_vertex(removed)
+
+    assert graph.nodes[1].degree() == 0
+    assert graph.find_by_name(4) is graph.nodes[3] and graph.index_of(graph.nodes[3]) == 3
+    assert graph.nodes[0].get_sources() == [graph.nodes[3]]
+
+    graph.add_edge((graph.nodes[3], graph.nodes[1]), 7)
+    graph.remove_vertex(graph.nodes[1])
+
+    assert [node.degree() for node in graph.nodes] == [0, 0, 1]
+    assert graph.nodes[2].get_neighbor_by_name(0) is graph.nodes[0]
+
+
+def test_integer_ids():
+    graph = GraphAdjList.of_order(4, labels=['Minsk', 'Brest', 'Grodno', 'Gomel'])
+
+    assert [node.name for node in graph.nodes] == [0, 1, 2, 3]
+
+    graph.add_edges_from([(0, 1, 3), (1, 2, 1), (2, 3, 2)], double=True)
+    graph.add_vertex(label='Vitebsk')
+    graph.add_double_edge((graph.find_by_label('Vitebsk'), graph.find_by_label('Minsk')), 4)
+
+    assert graph.nodes[-1].name == 4
+    assert graph.get_label(graph.find_by_name(2)) == 'Grodno'
+    assert graph.find_by_label('Vitebsk').get_neighbor_weight_by_name(0) == 4
+    assert graph.nodes[0].get_neighbors_names() == {1, 4}
+
+    distance, path = graph.shortest_path(graph.find_by_label('Vitebsk'), graph.find_by_label('Gomel'))
+
+    assert distance == 10
+    assert [graph.get_label(node) for node in path] == ['Vitebsk', 'Minsk', 'Brest', 'Grodno', 'Gomel']
+
+    graph.remove_vertex(graph.find_by_label('Brest'))
+
+    assert graph.find_by_label('Brest') is None
+    assert graph.number_of_connected_components() == 2
+    assert dsatur(graph) == {0: 0, 2: 0, 3: 1, 4: 1}
+
+    with pytest.raises(ValueError):
+        graph.set_label(graph.nodes[0], 'Gomel')
+    graph.set_label(graph.nodes[0], 'Mensk')
+
+    assert graph.find_by_label('Minsk') is None
+    assert graph.find_by_label('Mensk') is graph.nodes[0]
+
+    graph.set_label(graph.nodes[1], 'Minsk')
+    graph.remove_vertex(graph.nodes[0])
+
+    assert graph.find_by_label('Minsk').name == 2
+
+    node_list = [Node() for _ in range(3)]
+    graph = GraphAdjList(node_list, first_node_name=10)
+
+    assert [node.name for node in graph.nodes] == [10, 11, 12]
+
+
+def test_matrix_storage():
+    graph = GraphAdjMatrix.from_edges(3, [0, 1, 2, 2], [1, 2, 0, 2], [4, 5, 6, 7], dtype=np.float32)
+
+    assert graph.weights.dtype == np.float32
+    assert graph.adjacency.tolist() == [[False, True, False], [False, False, True], [True, False, False]]
+    assert graph[2, 2] == (0, np.inf)
+    assert graph[1, 2] == (1, 5)
+
+    for _ in range(10):
+        graph.add_vertex()
+
+    assert graph.size == 13
+    assert graph.capacity() == 24
+    assert graph[0, 1] == (1, 4)
+    assert not graph.adjacency[3:].any()
+    assert np.isinf(graph.weights[:, 3:]).all()
+
+    graph.add_edge((12, 0), 2)
+
+    assert graph.get_neighbors(12) == [0]
+    assert graph.matrix['weight'][12][0] == 2
+
+
 def test_remove_vertex():
     matrix = [[np.inf, np.inf, 1],
               [np.inf, np.inf, np.inf],
@@ -170,6 +322,38 @@ def test_remove_vertex():
     assert not graph.is_adjacent((node_list[1], node_list[0]))
     assert not graph.is_adjacent((node_list[1], node_list[2]))
 
+    graph.add_vertex()
+
+    assert [node.number for node in graph.nodes] == [0, 2, 3]
+
+
+def test_remove_vertices():
+    generator = np.random.default_rng(2)
+    matrix = generator.integers(1, 10, (12, 12)).astype(float)
+    matrix[generator.random((12, 12)) < 0.5] = np.inf
+    graph = GraphAdjMatrix(matrix=matrix, size=12)
+    expected = graph.weights.copy()
+
+    graph.remove_vertex(4)
+    expected = np.delete(np.delete(expected, 4, axis=0), 4, axis=1)
+
+    assert graph.size == 11
+    assert graph.capacity() == 12
+    assert np.array_equal(graph.weights, expected)
+
+    graph.remove_vertices([0, 7, 10])
+    expected = np.delete(np.delete(expected, [0, 7, 10], axis=0), [0, 7, 10], axis=1)
+
+    assert graph.size == 8
+    assert np.array_equal(graph.weights, expected)
+    assert np.array_equal(graph.adjacency, np.isfinite(expected))
+
+    neighbors = graph.neighbors_of([1, 5, 6])
+
+    assert [row.tolist() for row in neighbors] == [graph.get_neighbors(1), graph.get_neighbors(5),
+                                                   graph.get_neighbors(6)]
+    assert graph.get_neighbors(1) == np.flatnonzero(np.isfinite(expected[1])).tolist()
+
 
 def test_neighbors():
     matrix = [[np.inf, 2, 1],
@@ -196,7 +380,7 @@ def test_euler_cycle():
     number_nodes = 6
     node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
 
-    correct_answer = ['a', 'b', 'c', 'd', 'f', 'c', 'e', 'a', 'd', 'e', 'f', 'a']
+    correct_answer = ['a', 'b', 'c', 'e', 'a', 'd', 'e', 'f', 'c', 'd', 'f', 'a']
 
     graph = GraphAdjList(node_list.copy())
 
@@ -217,14 +401,56 @@ def test_euler_cycle():
 
     path = graph.euler_cycle()
 
+    assert len(path) == len(correct_answer)
     for node, correct_answer in zip(path, correct_answer):
         assert node.name == correct_answer
 
+    passed_edges = {frozenset((path[i - 1].name, path[i].name)) for i in range(1, len(path))}
+    assert len(passed_edges) == len(graph.get_edges()) // 2
+    assert sum(node.degree() for node in graph.nodes) == 22
+
     graph.remove_edge((node_list[0], node_list[1]))
     graph.remove_edge((node_list[1], node_list[0]))
 
     assert graph.euler_cycle() == []
 
+    path = graph.euler_path()
+
+    assert path[0].name == 'a' and path[-1].name == 'b'
+    assert len(path) == 11
+
+
+def test_directed_euler_path():
+    number_nodes = 4
+    node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
+
+    graph = GraphAdjList(node_list.copy())
+
+    graph.add_edge((node_list[0], node_list[1]))
+    graph.add_edge((node_list[1], node_list[2]))
+    graph.add_edge((node_list[2], node_list[0]))
+    graph.add_edge((node_list[0], node_list[3]))
+    graph.add_edge((node_list[3], node_list[0]))
+
+    assert [node.name for node in graph.euler_cycle(directed=True)] == ['a', 'b', 'c', 'a', 'd', 'a']
+    assert graph.euler_cycle() == []
+
+    graph.remove_edge((node_list[3], node_list[0]))
+
+    assert graph.euler_cycle(directed=True) == []
+    assert [node.name for node in graph.euler_path(directed=True)] == ['a', 'b', 'c', 'a', 'd']
+
+    graph.add_vertex()
+    graph.add_double_edge((graph.nodes[1], graph.nodes[4]))
+
+    assert [node.name for node in graph.euler_path(directed=True)] == ['a', 'b', 'e', 'b', 'c', 'a', 'd']
+
+    graph.add_vertex()
+    graph.add_vertex()
+    graph.add_double_edge((graph.nodes[5], graph.nodes[6]))
+
+    assert graph.euler_path(directed=True) == []
+
 
 def test_width_bypass():
     number_nodes = 9
@@ -256,6 +482,33 @@ def test_width_bypass():
     assert node_list[8].get_mark() == 1
 
 
+def test_breadth_first_search():
+    number_nodes = 9
+    node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
+
+    graph = GraphAdjList(node_list.copy())
+
+    graph.add_double_edge((node_list[0], node_list[1]))
+    graph.add_double_edge((node_list[1], node_list[2]))
+    graph.add_double_edge((node_list[0], node_list[2]))
+    graph.add_double_edge((node_list[2], node_list[3]))
+    graph.add_double_edge((node_list[2], node_list[4]))
+    graph.add_double_edge((node_list[5], node_list[6]))
+    graph.add_double_edge((node_list[7], node_list[8]))
+
+    levels, parents, components = breadth_first_search(graph.to_csr(), start=3)
+
+    assert levels.tolist() == [2, 2, 1, 0, 2, 0, 1, 0, 1]
+    assert parents.tolist() == [2, 2, 3, -1, 2, -1, 5, -1, 7]
+    assert components.tolist() == [0, 0, 0, 0, 0, 1, 1, 2, 2]
+
+    levels, parents, components = graph.width_bypass(node_list[3])
+
+    assert node_list[0].get_mark() == 2
+    assert node_list[0].get_marker() == node_list[2]
+    assert graph.number_of_connected_components() == 3
+
+
 def test_number_of_connected_components():
     number_nodes = 8
     node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
@@ -388,6 +641,48 @@ def test_kruskal():
     assert kruskal_graph.nodes[4].get_neighbors_names() == {'b', 'd'}
 
 
+def test_disjoint_set():
+    components = DisjointSet(5)
+
+    assert components.union(0, 1)
+    assert components.union(3, 4)
+    assert not components.union(1, 0)
+    assert components.connected(0, 1)
+    assert not components.connected(1, 3)
+    assert components.count == 3
+
+    assert components.add() == 5
+    assert components.union(5, 4)
+    assert components.connected(3, 5)
+    assert components.count == 3
+
+
+def test_kruskal_edges():
+    number_nodes = 6
+    node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
+
+    graph = GraphAdjList(node_list.copy())
+
+    graph.add_double_edge((node_list[0], node_list[1]), 2)
+    graph.add_double_edge((node_list[0], node_list[3]), 3)
+    graph.add_double_edge((node_list[1], node_list[2]), 4)
+    graph.add_double_edge((node_list[1], node_list[3]), 4)
+    graph.add_double_edge((node_list[1], node_list[4]), 1)
+    graph.add_double_edge((node_list[3], node_list[4]), 2)
+    graph.add_edge((node_list[4], node_list[1]), 7)
+    graph.add_edge((node_list[5], node_list[5]), 0)
+
+    edges = graph.kruskal(as_edges=True)
+
+    assert [(edge[0].name, edge[1].name, weight) for edge, weight in edges] == \
+           [('b', 'e', 1), ('a', 'b', 2), ('d', 'e', 2), ('b', 'c', 4)]
+    assert all(not node.is_marked() for node in graph.nodes)
+
+    sources, targets, weights = graph.to_csr().kruskal(as_edges=True)
+
+    assert weights.sum() == 9
+
+
 def test_prim():
 
     number_nodes = 5
@@ -411,6 +706,31 @@ def test_prim():
     assert prim_graph.nodes[4].get_neighbors_names() == {'b', 'd'}
 
 
+def test_prim_forest():
+    number_nodes = 7
+    node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
+
+    graph = GraphAdjList(node_list.copy())
+
+    graph.add_double_edge((node_list[0], node_list[1]), 2)
+    graph.add_double_edge((node_list[0], node_list[2]), 1)
+    graph.add_double_edge((node_list[1], node_list[2]), 1)
+    graph.add_double_edge((node_list[4], node_list[5]), 3)
+    graph.add_double_edge((node_list[5], node_list[6]), 1)
+    graph.add_double_edge((node_list[4], node_list[6]), 5)
+
+    edges = graph.prim(as_edges=True)
+
+    assert [(edge[0].name, edge[1].name, weight) for edge, weight in edges] == \
+           [('a', 'c', 1), ('c', 'b', 1), ('e', 'f', 3), ('f', 'g', 1)]
+    assert all(not node.is_marked() for node in graph.nodes)
+
+    prim_graph = graph.prim()
+
+    assert prim_graph.number_of_connected_components() == 3
+    assert prim_graph.nodes[3].get_neighbors_names() == set()
+
+
 def test_dijkstra():
 
     number_nodes = 7
@@ -448,6 +768,145 @@ def test_dijkstra():
     assert graph.nodes[6].get_marker().name == 'f'
 
 
+def test_heap_dijkstra():
+
+    number_nodes = 7
+    node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
+
+    graph = GraphAdjList(node_list.copy())
+
+    graph.add_double_edge((node_list[0], node_list[1]), 2)
+    graph.add_double_edge((node_list[0], node_list[2]), 4)
+    graph.add_double_edge((node_list[0], node_list[3]), 5)
+    graph.add_double_edge((node_list[1], node_list[2]), 1)
+    graph.add_double_edge((node_list[1], node_list[4]), 8)
+    graph.add_double_edge((node_list[2], node_list[4]), 3)
+    graph.add_double_edge((node_list[2], node_list[3]), 3)
+    graph.add_double_edge((node_list[3], node_list[5]), 2)
+    graph.add_double_edge((node_list[4], node_list[5]), 2)
+    graph.add_double_edge((node_list[4], node_list[6]), 3)
+    graph.add_double_edge((node_list[5], node_list[6]), 1)
+
+    distances, predecessors = graph.shortest_paths(node_list[0])
+
+    assert distances.tolist() == [0, 2, 3, 5, 6, 7, 8]
+    assert predecessors.tolist() == [-1, 0, 1, 0, 2, 3, 5]
+    assert all(not node.is_marked() for node in graph.nodes)
+
+    distances, predecessors = dijkstra(graph.to_csr(), 0, targets=[1, 2])
+
+    assert distances.tolist()[:3] == [0, 2, 3]
+    assert np.isinf(distances[6]) and predecessors[6] == -1
+    assert reconstruct_path(predecessors, 0, 2) == [0, 1, 2]
+    assert reconstruct_path(predecessors, 0, 6) == []
+
+    distance, path = graph.shortest_path(node_list[0], node_list[6])
+
+    assert distance == 8
+    assert [node.name for node in path] == ['a', 'd', 'f', 'g']
+
+
+def test_point_to_point():
+    side = 12
+    sources, targets, weights = [], [], []
+    for row in range(side):
+        for column in range(side):
+            vertex = row * side + column
+            for neighbor in ([vertex + 1] if column + 1 < side else []) + ([vertex + side] if row + 1 < side else []):
+                weight = 1 + (vertex * 7 + neighbor) % 3
+                sources += [vertex, neighbor]
+                targets += [neighbor, vertex]
+                weights += [weight, weight]
+    graph = GraphCSR.from_edges(side * side, sources, targets, weights)
+    reverse = graph.reverse()
+    edge_weights = dict(zip(zip(sources, targets), weights))
+
+    def manhattan(target):
+        return lambda vertex: abs(vertex // side - target // side) + abs(vertex % side - target % side)
+
+    for source, target in ((0, 143), (5, 100), (77, 77), (60, 62)):
+        distances, _ = dijkstra(graph, source)
+
+        distance, path, dijkstra_settled = a_star(graph, source, target)
+        assert distance == distances[target] and path[0] == source and path[-1] == target
+
+        distance, path, a_star_settled = a_star(graph, source, target, manhattan(target))
+        assert distance == distances[target]
+        assert sum(edge_weights[path[i - 1], path[i]] for i in range(1, len(path))) == distance
+        assert a_star_settled <= dijkstra_settled
+
+        distance, path, _ = bidirectional_dijkstra(graph, source, target, reverse)
+        assert distance == distances[target] and path[0] == source and path[-1] == target
+        assert all(path[i] in graph.get_neighbors(path[i - 1])[0] for i in range(1, len(path)))
+
+    node_list = [Node() for _ in range(4)]
+    list_graph = GraphAdjList(node_list)
+    list_graph.add_edge((node_list[0], node_list[1]), 2)
+    list_graph.add_edge((node_list[1], node_list[2]), 2)
+    list_graph.add_edge((node_list[0], node_list[2]), 5)
+
+    assert list_graph.bidirectional_shortest_path(node_list[0], node_list[2])[:2] == (4, node_list[:3])
+    assert list_graph.a_star(node_list[0], node_list[2], lambda node: 0)[:2] == (4, node_list[:3])
+    assert list_graph.bidirectional_shortest_path(node_list[2], node_list[0])[:2] == (np.inf, [])
+    assert list_graph.a_star(node_list[0], node_list[3])[:2] == (np.inf, [])
+
+
+def test_track_components():
+    graph = GraphAdjList.of_order(6)
+    graph.track_components()
+
+    assert graph.number_of_connected_components() == 6
+
+    graph.add_double_edge((graph.nodes[0], graph.nodes[1]))
+    graph.add_edges_from([(2, 3), (3, 4)])
+
+    assert graph.number_of_connected_components() == 3
+    assert graph.are_connected(graph.nodes[2], graph.nodes[4])
+    assert not graph.are_connected(graph.nodes[0], graph.nodes[5])
+    assert all(not node.is_marked() for node in graph.nodes)
+
+    node = graph.add_vertex()
+    graph.add_edge((graph.nodes[5], node))
+    graph.add_edge((node, graph.nodes[0]))
+    graph.add_edge((graph.nodes[1], graph.nodes[2]))
+
+    assert graph.is_connected()
+
+    graph.remove_edge((graph.nodes[1], graph.nodes[2]))
+
+    assert graph.number_of_connected_components() == 2
+
+    graph.remove_vertex(graph.nodes[3])
+
+    assert graph.number_of_connected_components() == 3
+    assert not graph.are_connected(graph.find_by_name(2), graph.find_by_name(4))
+
+    graph.track_components(False)
+
+    # bfs follows directions of edges, so 5 -> 6 -> 0 is not joined to 0 <-> 1
+    assert graph.number_of_connected_components() == 4
+    assert graph.nodes[0].is_marked()
+
+
+def test_multi_source_distances():
+    generator = np.random.default_rng(5)
+    sources, targets = generator.integers(0, 50, 200), generator.integers(0, 50, 200)
+    graph = GraphCSR.from_edges(50, sources, targets, generator.integers(1, 10, 200))
+
+    expected = np.array([dijkstra(graph, source)[0] for source in range(0, 50, 3)])
+
+    assert np.array_equal(graph.distances(range(0, 50, 3), processes=1), expected)
+    assert np.array_equal(multi_source_distances(graph, range(0, 50, 3), processes=2, chunk_size=4), expected)
+
+    node_list = [Node() for _ in range(3)]
+    list_graph = GraphAdjList(node_list)
+    list_graph.add_double_edge((node_list[0], node_list[1]), 2)
+
+    assert list_graph.distances([node_list[1], node_list[2]], processes=2).tolist() == \
+        [[2, 0, np.inf], [np.inf, np.inf, 0]]
+    assert all(not node.is_marked() for node in list_graph.nodes)
+
+
 def test_gale_shepley_matrix4x4():
     employees_ranks = [
         [1, 0, 2, 3],  # for 1st employee preferences of tasks
@@ -504,6 +963,35 @@ def test_gale_shepley_matrix5x5():
     assert result2 == {0: [1], 1: [0], 2: [4], 3: [3], 4: [2]}
 
 
+def test_gale_shapley_capacities():
+    residents_ranks = [[0, 1], [0, 1], [0], [1, 0], [0, 1]]
+    hospitals_ranks = [[3, 1, 0, 4], [0, 1, 3, 4, 2]]
+
+    pairs, residents_sum, hospitals_sum = GraphAdjMatrix.gale_shapley(residents_ranks, hospitals_ranks, [2, 2])
+
+    # resident 2 is not acceptable for hospital 0, resident 4 is rejected by it for 0 and 1
+    assert pairs == {0: [1, 0], 1: [3, 4]}
+    assert residents_sum == 0 + 0 + 0 + 1
+    assert hospitals_sum == 1 + 2 + 2 + 3
+
+    generator = np.random.default_rng(4)
+    residents_ranks = [generator.permutation(4).tolist() for _ in range(9)]
+    hospitals_ranks = [generator.permutation(9).tolist() for _ in range(4)]
+    capacities = [1, 2, 3, 1]
+    pairs, _, _ = GraphAdjMatrix.gale_shapley(residents_ranks, hospitals_ranks, capacities)
+
+    hospital_of = {resident: hospital for hospital in pairs for resident in pairs[hospital]}
+    assert len(hospital_of) == sum(capacities)
+    for resident, preferences in enumerate(residents_ranks):
+        for hospital in preferences:
+            if hospital_of.get(resident) == hospital:
+                break
+            # resident prefers hospital, so hospital has to be full of residents it likes more
+            assert len(pairs[hospital]) == capacities[hospital]
+            worst = hospitals_ranks[hospital].index(pairs[hospital][-1])
+            assert worst < hospitals_ranks[hospital].index(resident)
+
+
 def test_floid():
     matrix = [[np.inf, 2, 1, -2, np.inf],
               [1, 3, 2, -1, 1],
@@ -525,6 +1013,60 @@ def test_floid():
         print(row)
 
 
+def test_floid_paths():
+    matrix = [[np.inf, 2, 1, 2, np.inf],
+              [1, np.inf, 2, 1, 1],
+              [np.inf, 1, np.inf, np.inf, np.inf],
+              [np.inf, np.inf, np.inf, np.inf, 3],
+              [np.inf, 1, 10, np.inf, np.inf]]
+    graph = GraphAdjMatrix(matrix=matrix, size=5)
+
+    graph.floid()
+
+    assert graph.matrix['weight'][0].tolist() == [3, 2, 1, 2, 3]
+    assert graph.matrix['weight'][3].tolist() == [5, 4, 6, 5, 3]
+    assert graph.get_path(3, 2) == [3, 4, 1, 2]
+    assert graph.get_path(2, 2) == [2]
+
+    generator = np.random.default_rng(1)
+    matrix = generator.integers(1, 20, (23, 23)).astype(float)
+    matrix[generator.random((23, 23)) < 0.7] = np.inf
+
+    graph = GraphAdjMatrix(matrix=matrix, size=23)
+    blocked_graph = GraphAdjMatrix(matrix=matrix, size=23)
+
+    graph.floid()
+    blocked_graph.floid(block_size=5)
+
+    assert np.array_equal(graph.matrix['weight'], blocked_graph.matrix['weight'])
+    for start in range(23):
+        for end in range(23):
+            path = blocked_graph.get_path(start, end)
+            if start != end and path:
+                path_weight = sum(matrix[path[i - 1]][path[i]] for i in range(1, len(path)))
+                assert path_weight == graph.matrix['weight'][start][end]
+
+    # zero-weight cycles, every reachable pair needs a path
+    generator = np.random.default_rng(113)
+    matrix = generator.integers(0, 10, (14, 14)).astype(float)
+    matrix[generator.random((14, 14)) < 0.6] = np.inf
+
+    graph = GraphAdjMatrix(matrix=matrix, size=14)
+    blocked_graph = GraphAdjMatrix(matrix=matrix, size=14)
+
+    graph.floid()
+    blocked_graph.floid(block_size=2)
+
+    assert np.array_equal(graph.matrix['weight'], blocked_graph.matrix['weight'])
+    for start in range(14):
+        for end in range(14):
+            if start != end and graph.matrix['weight'][start][end] != np.inf:
+                path = blocked_graph.get_path(start, end)
+                assert path[0] == start and path[-1] == end
+                path_weight = sum(matrix[path[i - 1]][path[i]] for i in range(1, len(path)))
+                assert path_weight == graph.matrix['weight'][start][end]
+
+
 def test_place_station():
     matrix = [[np.inf, 2, 1, 2, np.inf],
               [1, 3, 2, 1, 1],
@@ -536,6 +1078,58 @@ def test_place_station():
     print()
 
     assert graph.place_station() == 1
+    assert graph.place_station(method='dijkstra') == 1
+    assert graph.center() == graph.center(method='dijkstra') == (1, 1)
+
+
+def test_center():
+    generator = np.random.default_rng(3)
+    for size, density in ((40, 0.1), (60, 0.05), (30, 0.02)):
+        matrix = generator.integers(1, 5, (size, size)).astype(float)
+        matrix[generator.random((size, size)) > density] = np.inf
+        graph = GraphAdjMatrix(matrix=matrix, size=size)
+
+        assert graph.center(method='dijkstra') == graph.center()
+
+
+def test_memmap_floid():
+    generator = np.random.default_rng(2)
+    matrix = generator.integers(1, 20, (30, 30)).astype(float)
+    matrix[generator.random((30, 30)) < 0.8] = np.inf
+
+    with tempfile.TemporaryDirectory() as directory:
+        graph = GraphAdjMatrix(matrix=matrix, size=30)
+        disk_graph = GraphAdjMatrix(matrix=matrix, size=30, directory=directory)
+        assert isinstance(disk_graph.weights, np.memmap)
+        assert len(os.listdir(directory)) == 2
+
+        assert disk_graph.place_station(block_size=7) == graph.place_station()
+        assert np.array_equal(disk_graph.weights, matrix_with_empty_diagonal(matrix))
+        assert len(os.listdir(directory)) == 2
+
+        graph.floid()
+        disk_graph.floid(block_size=7)
+        assert isinstance(disk_graph._inquiry, np.memmap)
+        assert np.array_equal(graph.weights, disk_graph.weights)
+        for start in range(30):
+            for end in range(30):
+                assert graph.matrix['weight'][start][end] == np.inf or \
+                    len(disk_graph.get_path(start, end)) > 0
+
+        disk_graph.add_vertex()
+        assert disk_graph.size == 31 and isinstance(disk_graph._weights, np.memmap)
+        assert np.array_equal(disk_graph.weights[:30, :30], graph.weights)
+        assert len(os.listdir(directory)) == 3
+
+        disk_graph.close()
+        assert len(os.listdir(directory)) == 0
+        del graph, disk_graph
+
+
+def matrix_with_empty_diagonal(matrix):
+    matrix = np.array(matrix)
+    np.fill_diagonal(matrix, np.inf)
+    return matrix
 
 
 def test_depth_first_search():
@@ -551,7 +1145,11 @@ def test_depth_first_search():
     graph.add_edge((node_list[2], node_list[5]))
     graph.add_edge((node_list[4], node_list[6]))
 
-    graph.depth_first_search()
+    graph.add_edge((node_list[6], node_list[1]))
+    graph.add_edge((node_list[0], node_list[6]))
+    graph.add_edge((node_list[5], node_list[4]))
+
+    discovery, finish, parents, kinds = graph.depth_first_search()
 
     print()
     print(graph)
@@ -559,10 +1157,18 @@ def test_depth_first_search():
     assert graph.nodes[0].get_mark() == 0
     assert graph.nodes[1].get_mark() == 1
     assert graph.nodes[3].get_mark() == 2
-    assert graph.nodes[2].get_mark() == 3
-    assert graph.nodes[5].get_mark() == 4
-    assert graph.nodes[4].get_mark() == 5
-    assert graph.nodes[6].get_mark() == 6
+    assert graph.nodes[4].get_mark() == 3
+    assert graph.nodes[6].get_mark() == 4
+    assert graph.nodes[2].get_mark() == 5
+    assert graph.nodes[5].get_mark() == 6
+    assert graph.nodes[6].get_marker() == node_list[4]
+
+    assert discovery.tolist() == [0, 1, 9, 2, 4, 10, 5]
+    assert finish.tolist() == [13, 8, 12, 3, 7, 11, 6]
+    assert parents.tolist() == [-1, 0, 0, 1, 1, 2, 4]
+    assert kinds.tolist() == [TREE_EDGE, TREE_EDGE, FORWARD_EDGE, TREE_EDGE, TREE_EDGE,
+                              TREE_EDGE, TREE_EDGE, CROSS_EDGE, BACK_EDGE]
+    assert all(weight == 1 for _, weight in graph.get_edges())
 
 
 def test_hron_sequence():
@@ -585,6 +1191,14 @@ def test_hron_sequence():
     for i, node in enumerate(order):
         print("{}: {}".format(len(order) - 1 - i, node))
 
+    assert [node.name for node in order] == ['c', 'b', 'a', 'd']
+    for (node, neighbor), _ in graph.get_edges():
+        assert order.index(node) > order.index(neighbor)
+
+    graph.add_edge((node_list[2], node_list[3]))
+
+    assert graph.hron_sequence() is None
+
 
 def test_gis():
     number_nodes = 5
@@ -627,7 +1241,18 @@ def test_gis():
 
     related_colors = gis(graph)
 
-    assert related_colors == {0: 1, 1: 2, 2: 1, 3: 2, 4: 3, 5: 2, 6: 1, 7: 3, 8: 3, 9: 2}
+    assert related_colors == {0: 1, 1: 2, 2: 1, 3: 2, 4: 3, 5: 2, 6: 3, 7: 3, 8: 1, 9: 1}
+
+    # directions of edges are ignored
+    graph = GraphAdjList.of_order(5)
+    graph.add_edges_from([(0, 1), (0, 2), (0, 3), (0, 4), (1, 2), (3, 4)])
+    related_colors = gis(graph)
+
+    assert related_colors[0] not in {related_colors[node] for node in range(1, 5)}
+    assert related_colors[1] != related_colors[2] and related_colors[3] != related_colors[4]
+
+    symmetric = graph.to_csr().symmetric()
+    assert symmetric.targets.tolist() == [1, 2, 3, 4, 0, 2, 0, 1, 0, 4, 0, 3]
 
 
 def test_dsatur():
@@ -674,3 +1299,168 @@ def test_dsatur():
     assert related_colors == {0: 0, 1: 1, 2: 0, 3: 1, 4: 2, 5: 1, 6: 0, 7: 2, 8: 2, 9: 1}
 
 
+def test_csr_conversion():
+    number_nodes = 4
+    node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
+
+    graph = GraphAdjList(node_list.copy())
+
+    graph.add_edge((node_list[0], node_list[2]), 3)
+    graph.add_edge((node_list[0], node_list[1]), 2)
+    graph.add_double_edge((node_list[1], node_list[3]), 5)
+
+    csr_graph = GraphCSR.from_adj_list(graph)
+
+    assert csr_graph.order() == 4
+    assert csr_graph.number_of_edges() == 4
+    assert csr_graph.offsets.tolist() == [0, 2, 3, 3, 4]
+    assert csr_graph.targets.tolist() == [2, 1, 3, 1]
+    assert csr_graph.weights.tolist() == [3, 2, 5, 5]
+
+    list_graph = csr_graph.to_adj_list()
+
+    assert [node.name for node in list_graph.nodes] == ['a', 'b', 'c', 'd']
+    for node, original in zip(list_graph.nodes, graph.nodes):
+        assert [(neighbor.name, weight) for neighbor, weight in node.get_neighbors()] == \
+               [(neighbor.name, weight) for neighbor, weight in original.get_neighbors()]
+
+    matrix_graph = csr_graph.to_adj_matrix()
+
+    assert tuple(matrix_graph[0, 2]) == (1, 3)
+    assert tuple(matrix_graph[2, 0]) == (0, np.inf)
+
+    csr_graph = GraphCSR.from_adj_matrix(matrix_graph)
+
+    assert csr_graph.targets.tolist() == [1, 2, 3, 1]
+    assert csr_graph.weights.tolist() == [2, 3, 5, 5]
+
+
+def test_csr_algorithms():
+    number_nodes = 7
+    node_list = [Node(chr(ord('a') + i)) for i in range(number_nodes)]
+
+    graph = GraphAdjList(node_list.copy())
+
+    graph.add_double_edge((node_list[0], node_list[1]), 2)
+    graph.add_double_edge((node_list[0], node_list[2]), 4)
+    graph.add_double_edge((node_list[1], node_list[2]), 1)
+    graph.add_double_edge((node_list[2], node_list[3]), 3)
+    graph.add_double_edge((node_list[5], node_list[6]), 1)
+
+    csr_graph = GraphCSR.from_adj_list(graph)
+
+    assert csr_graph.width_bypass().tolist() == [0, 1, 1, 2, 0, 0, 1]
+    assert csr_graph.number_of_connected_components() == 3
+    assert not csr_graph.is_connected()
+    assert csr_graph.has_cycle()
+    assert not csr_graph.is_bipartite()[0]
+
+    distances, predecessors = csr_graph.dijkstra(0)
+
+    assert distances.tolist() == [0, 2, 3, 6, np.inf, np.inf, np.inf]
+    assert predecessors.tolist() == [-1, 0, 1, 2, -1, -1, -1]
+
+    for spanning_tree in (csr_graph.kruskal(), csr_graph.prim()):
+        assert spanning_tree.number_of_edges() == 2 * 4
+        assert spanning_tree.weights.sum() == 2 * (2 + 1 + 3 + 1)
+        assert spanning_tree.number_of_connected_components() == 3
+        assert not spanning_tree.has_cycle()
+
+    graph.remove_double_edge((node_list[0], node_list[1]))
+    is_bipartite, segments = GraphCSR.from_adj_list(graph).is_bipartite()
+
+    assert is_bipartite
+    assert segments[0].tolist() == [0, 1, 3, 4, 5]
+    assert segments[1].tolist() == [2, 6]
+
+
+def test_coloring_colors():
+    generator = np.random.default_rng(6)
+    sources, targets = generator.integers(0, 300, 1500), generator.integers(0, 300, 1500)
+    keep = sources != targets
+    graph = GraphCSR.from_edges(300, np.concatenate((sources[keep], targets[keep])),
+                                np.concatenate((targets[keep], sources[keep])))
+
+    for coloring, first_color in ((dsatur_colors, 0), (gis_colors, 1)):
+        colors = coloring(graph)
+
+        assert np.all(colors >= first_color)
+        assert np.all(colors[graph.get_sources()] != colors[graph.targets])
+        assert set(colors.tolist()) == set(range(first_color, int(colors.max()) + 1))
+
+
+def test_exact_colors():
+    def undirected(order, edges):
+        edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+        return GraphCSR.from_edges(order, np.concatenate((edges[:, 0], edges[:, 1])),
+                                   np.concatenate((edges[:, 1], edges[:, 0])))
+
+    # grotzsch graph: no triangles, but 4 colors are needed
+    graph = undirected(11, [(0, 1), (1, 2), (2, 3), (3, 4), (4, 0), (5, 1), (5, 4), (6, 0), (6, 2), (7, 1),
+                            (7, 3), (8, 2), (8, 4), (9, 3), (9, 0), (10, 5), (10, 6), (10, 7), (10, 8), (10, 9)])
+    colors, optimal = exact_colors(graph)
+
+    assert optimal and colors.max() + 1 == 4
+    assert np.all(colors[graph.get_sources()] != colors[graph.targets])
+
+    generator = np.random.default_rng(7)
+    rows, columns = np.triu_indices(40, 1)
+    chosen = generator.random(len(rows)) < 0.5
+    graph = undirected(40, np.stack((rows[chosen], columns[chosen]), axis=1))
+    colors, optimal = exact_colors(graph)
+
+    assert optimal and colors.max() + 1 <= dsatur_colors(graph).max() + 1
+    assert np.all(colors[graph.get_sources()] != colors[graph.targets])
+
+    rows, columns = np.triu_indices(80, 1)
+    chosen = generator.random(len(rows)) < 0.5
+    graph = undirected(80, np.stack((rows[chosen], columns[chosen]), axis=1))
+    colors, optimal = exact_colors(graph, time_budget=0.05)
+
+    assert not optimal
+    assert np.all(colors[graph.get_sources()] != colors[graph.targets])
+
+    graph = GraphAdjList.of_order(5)
+    graph.add_edges_from([(i, j) for i in range(5) for j in range(5) if i != j])
+
+    assert exact_coloring(graph) == ({0: 0, 1: 1, 2: 2, 3: 3, 4: 4}, True)
+
+
+def test_portfolio_colors():
+    generator = np.random.default_rng(3)
+    rows, columns = np.triu_indices(60, 1)
+    chosen = generator.random(len(rows)) < 0.3
+    sources, targets = rows[chosen], columns[chosen]
+    graph = GraphCSR.from_edges(60, np.concatenate((sources, targets)), np.concatenate((targets, sources)))
+
+    for seed in range(3):
+        for colors in (dsatur_colors(graph, seed), gis_colors(graph, seed)):
+            assert np.all(colors[graph.get_sources()] != colors[graph.targets])
+
+    start = dsatur_colors(graph)
+    colors = tabucol(graph, start, int(start.max()) + 1, seed=0)
+    assert np.all(colors[graph.get_sources()] != colors[graph.targets])
+
+    for workers in (1, 2):
+        colors = portfolio_colors(graph, time_budget=0.2, workers=workers)
+        assert np.all(colors[graph.get_sources()] != colors[graph.targets])
+        assert colors.max() <= start.max()
+
+    list_graph = GraphAdjList.of_order(4)
+    list_graph.add_edges_from([(0, 1), (1, 2), (2, 0), (2, 3)], double=True)
+    coloring = portfolio_coloring(list_graph, time_budget=0.05, workers=1)
+    assert len(set(coloring.values())) == 3 and coloring[0] != coloring[1] != coloring[2] != coloring[0]
+
+
+def test_coloring_after_removal():
+    graph = GraphAdjList.of_order(4)
+    graph.add_edges_from([(0, 1), (1, 2), (2, 3)], double=True)
+    graph.remove_vertex(graph.find_by_name(1))
+    node = graph.add_vertex()
+    graph.add_edges_from([(node, 2), (node, 3)], double=True)
+
+    colorings = (dsatur(graph), gis(graph), exact_coloring(graph)[0],
+                 portfolio_coloring(graph, time_budget=0.05, workers=1))
+    for coloring in colorings:
+        assert set(coloring) == {0, 2, 3, 4}
+        assert coloring[2] != coloring[3] != coloring[4] != coloring[2]
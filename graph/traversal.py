@@ -0,0 +1,229 @@
+from collections import deque
+
+import numpy as np
+
+TREE_EDGE, BACK_EDGE, FORWARD_EDGE, CROSS_EDGE = range(4)
+
+
+def breadth_first_search(graph, start=0):
+    """
+    bfs over every component of graph in csr form (graph.csr_graph.GraphCSR),
+    components are started from start and then from unvisited vertices in index order
+    returns arrays of bfs levels (0 for the root of every component),
+    bfs parents (-1 for roots) and component ids (in order of discovery)
+    """
+    offsets, adjacency = graph.offsets, graph.targets
+    order = graph.order()
+
+    visited = bytearray(order)
+    levels = [0] * order
+    parents = [-1] * order
+    components = [0] * order
+
+    component = -1
+    cursor = 0
+    root = start if order else None
+    while root is not None:
+        component += 1
+        visited[root] = 1
+        components[root] = component
+        queue = deque([root])
+
+        while queue:
+            vertex = queue.popleft()
+            level = levels[vertex] + 1
+            for neighbor in adjacency[offsets[vertex]:offsets[vertex + 1]].tolist():
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
+                    levels[neighbor] = level
+                    parents[neighbor] = vertex
+                    components[neighbor] = component
+                    queue.append(neighbor)
+
+        # every vertex before the cursor is visited, so the scan for roots is linear in total
+        while cursor < order and visited[cursor]:
+            cursor += 1
+        root = cursor if cursor < order else None
+
+    return np.array(levels, dtype=np.int64), np.array(parents, dtype=np.int64), \
+        np.array(components, dtype=np.int64)
+
+
+def depth_first_search(graph, start=0):
+    """
+    iterative dfs over every component of graph in csr form (graph.csr_graph.GraphCSR),
+    components are started from start and then from unvisited vertices in index order
+    returns arrays of discovery and finish times (one clock for both),
+    dfs parents (-1 for roots) and kind of every edge (TREE_EDGE, BACK_EDGE, FORWARD_EDGE, CROSS_EDGE)
+    in the order of graph.targets
+    """
+    offsets, adjacency = graph.offsets.tolist(), graph.targets.tolist()
+    order = graph.order()
+
+    discovery = [-1] * order
+    finish = [-1] * order
+    parents = [-1] * order
+    kinds = bytearray(len(adjacency))
+    cursors = offsets[:-1]
+
+    time = 0
+    cursor = 0
+    root = start if order else None
+    while root is not None:
+        discovery[root] = time
+        time += 1
+        stack = [root]
+
+        while stack:
+            vertex = stack[-1]
+            position = cursors[vertex]
+            if position == offsets[vertex + 1]:
+                finish[vertex] = time
+                time += 1
+                stack.pop()
+                continue
+
+            cursors[vertex] = position + 1
+            neighbor = adjacency[position]
+            if discovery[neighbor] == -1:
+                kinds[position] = TREE_EDGE
+                parents[neighbor] = vertex
+                discovery[neighbor] = time
+                time += 1
+                stack.append(neighbor)
+            elif finish[neighbor] == -1:
+                kinds[position] = BACK_EDGE
+            elif discovery[neighbor] > discovery[vertex]:
+                kinds[position] = FORWARD_EDGE
+            else:
+                kinds[position] = CROSS_EDGE
+
+        while cursor < order and discovery[cursor] != -1:
+            cursor += 1
+        root = cursor if cursor < order else None
+
+    return np.array(discovery, dtype=np.int64), np.array(finish, dtype=np.int64), \
+        np.array(parents, dtype=np.int64), np.frombuffer(kinds, dtype=np.uint8)
+
+
+def topological_order(graph):
+    """
+    returns vertices in order of dfs finishing, i.e. reversed topological order,
+    None if graph has a cycle
+    """
+    _, finish, _, kinds = depth_first_search(graph)
+    if np.any(kinds == BACK_EDGE):
+        return None
+    return np.argsort(finish)
+
+
+def number_of_components(components):
+    return int(components.max()) + 1 if len(components) else 0
+
+
+def bipartition(graph, levels):
+    """
+    returns side (0 or 1) of every vertex if bfs levels split graph in two parts, None otherwise
+    """
+    sides = levels % 2
+    if np.any(sides[graph.get_sources()] == sides[graph.targets]):
+        return None
+    return sides
+
+
+def has_non_tree_edge(graph, parents):
+    """
+    checks if there is an edge which is not an edge of bfs forest given by parents
+    """
+    sources = graph.get_sources()
+    return bool(np.any((graph.targets != parents[sources]) & (parents[graph.targets] != sources)))
+
+
+def _mirrored_edges(graph):
+    """
+    for graph storing every undirected edge in both directions returns
+    position of the opposite copy of every edge, None if some edge has no copy
+    """
+    sources, targets = graph.get_sources().astype(np.int64), graph.targets.astype(np.int64)
+    keys = np.minimum(sources, targets) * graph.order() + np.maximum(sources, targets)
+    mirrored = np.empty(len(targets), dtype=np.int64)
+
+    forward = np.flatnonzero(sources < targets)
+    backward = np.flatnonzero(sources > targets)
+    loops = np.flatnonzero(sources == targets)
+    if len(forward) != len(backward) or len(loops) % 2:
+        return None
+
+    # k-th edge u -> v is paired with k-th edge v -> u, loops are paired with each other
+    forward = forward[np.argsort(keys[forward], kind='stable')]
+    backward = backward[np.argsort(keys[backward], kind='stable')]
+    if np.any(keys[forward] != keys[backward]):
+        return None
+    mirrored[forward], mirrored[backward] = backward, forward
+
+    loops = loops[np.argsort(keys[loops], kind='stable')]
+    if np.any(keys[loops[::2]] != keys[loops[1::2]]):
+        return None
+    mirrored[loops[::2]], mirrored[loops[1::2]] = loops[1::2], loops[::2]
+
+    return mirrored
+
+
+def euler_path(graph, directed=False):
+    """
+    hierholzer's algorithm over graph in csr form (graph.csr_graph.GraphCSR),
+    undirected graph has to store every edge in both directions
+    returns vertices of euler cycle if it exists, of euler path otherwise,
+    empty list if there is neither
+    """
+    offsets, adjacency = graph.offsets, graph.targets
+    out_degrees = np.diff(offsets)
+
+    if directed:
+        mirrored = None
+        balance = out_degrees - np.bincount(adjacency, minlength=graph.order())
+        starts, ends = np.flatnonzero(balance == 1), np.flatnonzero(balance == -1)
+        if np.any(np.abs(balance) > 1) or len(starts) != len(ends) or len(starts) > 1:
+            return []
+        number_of_edges = len(adjacency)
+    else:
+        mirrored = _mirrored_edges(graph)
+        if mirrored is None:
+            return []
+        starts = np.flatnonzero(out_degrees % 2 == 1)
+        if len(starts) not in (0, 2):
+            return []
+        mirrored = mirrored.tolist()
+        number_of_edges = len(adjacency) // 2
+
+    if number_of_edges == 0:
+        return []
+    start = int(starts[0]) if len(starts) else int(np.flatnonzero(out_degrees)[0])
+
+    cursors = offsets[:-1].tolist()
+    ends_of_edges = offsets[1:].tolist()
+    adjacency = adjacency.tolist()
+    used = bytearray(len(adjacency))
+
+    path = []
+    stack = [start]
+    while stack:
+        vertex = stack[-1]
+        position = cursors[vertex]
+        while position < ends_of_edges[vertex] and used[position]:
+            position += 1
+        cursors[vertex] = position
+
+        if position == ends_of_edges[vertex]:
+            path.append(stack.pop())
+        else:
+            used[position] = 1
+            if mirrored is not None:
+                used[mirrored[position]] = 1
+            stack.append(adjacency[position])
+
+    # some edges are unreachable from start, so graph is not connected
+    if len(path) != number_of_edges + 1:
+        return []
+
+    return path[::-1]